@@ -0,0 +1,143 @@
+"""Embeddable asynchronous API running the explanation pipeline without any terminal output"""
+
+import asyncio
+import functools
+import logging
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple, TypeVar
+
+from clingo import Symbol
+from clingo.ast import Location
+
+from .cli.clingo_app import ExplaidLlmApp
+from .llms.models import AbstractModel, ModelTag, OpenAIModel
+from .llms.reuse import ConflictSignature, ExplanationStore
+from .stages import compute_mus, compute_ucs, is_satisfiable, preprocess
+from .utils.logging import DEFAULT_LOGGER_NAME
+
+# Library users configure logging themselves, never fall back to printing on stderr
+logging.getLogger(DEFAULT_LOGGER_NAME).addHandler(logging.NullHandler())
+
+T = TypeVar("T")
+
+
+@dataclass
+class UnsatisfiableConstraint:
+    """An unsatisfiable constraint of the program together with its source location"""
+
+    constraint: str
+    location: Optional[Location]
+
+
+@dataclass
+class Timings:
+    """Wall clock durations of the pipeline stages in seconds"""
+
+    preprocessing: float = 0.0
+    satisfiability: float = 0.0
+    mus: float = 0.0
+    ucs: float = 0.0
+    llm: float = 0.0
+
+    @property
+    def total(self) -> float:
+        return self.preprocessing + self.satisfiability + self.mus + self.ucs + self.llm
+
+
+@dataclass
+class ExplanationResult:
+    """Result of explaining a (possibly satisfiable) program"""
+
+    satisfiable: bool
+    mus: List[Tuple[Symbol, bool]] = field(default_factory=list)
+    mus_minimal: bool = False
+    constraints: List[UnsatisfiableConstraint] = field(default_factory=list)
+    explanation: Optional[str] = None
+    reused: bool = False
+    timings: Timings = field(default_factory=Timings)
+
+
+async def _run(
+    executor: Optional[Executor], function: Callable[..., T], *args: Any, **kwargs: Any
+) -> Tuple[T, float]:
+    start = time.perf_counter()
+    result = await asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(function, *args, **kwargs)
+    )
+    return result, time.perf_counter() - start
+
+
+async def explain(
+    files: Sequence[str],
+    assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+    llm: Optional[AbstractModel] = None,
+    model_tag: ModelTag = ModelTag.GPT_4O_MINI,
+    api_key: Optional[str] = None,
+    executor: Optional[Executor] = None,
+    store: Optional[ExplanationStore] = None,
+    preprocess_workers: int = 0,
+) -> ExplanationResult:
+    """
+    Explains why the program in `files` is unsatisfiable. The solver stages run on `executor` (default: the running
+    loop's default executor), the LLM is prompted on the running loop. If no `llm` is given an `OpenAIModel` for
+    `model_tag` is used. With a `store` the LLM is skipped for conflicts of the same structure as a stored one. With
+    `preprocess_workers` the files are preprocessed in that many processes. Raises a ValueError if no facts could be
+    converted to assumptions.
+    """
+    files = list(files)
+    timings = Timings()
+
+    (program, assumptions), timings.preprocessing = await _run(
+        executor,
+        preprocess,
+        files,
+        assumption_signatures,
+        preprocess_workers=preprocess_workers,
+    )
+    satisfiable, timings.satisfiability = await _run(executor, is_satisfiable, files)
+    if satisfiable:
+        return ExplanationResult(satisfiable=True, timings=timings)
+    if len(assumptions) == 0:
+        raise ValueError(
+            "No assumptions for MUS computation found, either your program has no convertable facts or your "
+            "assumption signature filters are too restrictive."
+        )
+
+    (mus, assumptions), timings.mus = await _run(
+        executor, compute_mus, program, assumptions
+    )
+    (ucs, locations), timings.ucs = await _run(
+        executor, compute_ucs, files, mus, assumptions
+    )
+
+    signature = ConflictSignature.from_conflict(
+        assumptions.iter_symbols(a.literal for a in mus.assumptions), ucs.values()
+    )
+    explanation = store.lookup(signature) if store is not None else None
+    reused = explanation is not None
+    if not reused:
+        if llm is None:
+            llm = OpenAIModel(model_tag=model_tag, api_key=api_key)
+        start = time.perf_counter()
+        response = await ExplaidLlmApp.step_llm(
+            llm=llm, assumptions=assumptions, mus=mus, ucs=ucs.values()
+        )
+        timings.llm = time.perf_counter() - start
+        explanation = ExplaidLlmApp.parse_explanation(response)
+        if store is not None:
+            store.add(signature, explanation)
+
+    return ExplanationResult(
+        satisfiable=False,
+        mus=[(a.symbol, a.sign) for a in mus.assumptions],
+        mus_minimal=mus.minimal,
+        constraints=[
+            UnsatisfiableConstraint(constraint=constraint, location=locations.get(c_id))
+            for c_id, constraint in ucs.items()
+        ],
+        explanation=explanation,
+        reused=reused,
+        timings=timings,
+    )
@@ -10,7 +10,9 @@ from typing import (
     Awaitable,
     Callable,
     Dict,
+    FrozenSet,
     Iterable,
+    List,
     Optional,
     ParamSpec,
     Sequence,
@@ -20,18 +22,27 @@ from typing import (
 )
 
 import clingo
-from clingexplaid.mus import CoreComputer
 from clingexplaid.mus.core_computer import UnsatisfiableSubset
-from clingexplaid.preprocessors import AssumptionPreprocessor, FilterSignature
-from clingexplaid.unsat_constraints import UnsatConstraintComputer
-from clingo import Symbol
-from clingo.application import Application
+from clingo.application import Application, Flag
 from clingo.ast import Location
 from dotenv import load_dotenv
 
-from ..llms.models import AbstractModel, ModelTag, OpenAIModel
+from ..llms.models import AbstractModel, HedgedModel, ModelTag, OpenAIModel
+from ..llms.reuse import DEFAULT_REUSE_THRESHOLD, ConflictSignature, ExplanationStore
 from ..llms.templates import ExplainTemplate
-from ..utils.logging import DEFAULT_LOGGER_NAME
+from ..stages import (
+    compute_mus,
+    compute_mus_limited,
+    compute_ucs,
+    compute_ucs_limited,
+    is_satisfiable,
+    is_satisfiable_limited,
+    preprocess,
+)
+from ..utils.assumptions import AssumptionStore
+from ..utils.limits import LimitExceeded, ResourceLimits
+from ..utils.logging import DEFAULT_LOGGER_NAME, Lazy, setup_logger
+from ..utils.source import SourceCache
 from .rendering import (
     COLOR_GRAY,
     COLOR_MESSAGE,
@@ -41,6 +52,7 @@ from .rendering import (
     colored,
     progress_box,
     render_code_line,
+    render_code_snippet,
     render_details,
     render_llm_message,
 )
@@ -50,14 +62,7 @@ logger = logging.getLogger(DEFAULT_LOGGER_NAME)
 T = TypeVar("T")
 P = ParamSpec("P")
 
-
-def render_assumptions(assumptions: Iterable[Tuple[Symbol, bool]]) -> str:
-    output = []
-    for assumption in assumptions:
-        assumption_sign = "[+]" if assumption[1] else "[-]"
-        assumption_string = f"{assumption[0]}{assumption_sign}"
-        output.append(assumption_string)
-    return "{" + ", ".join(output) + "}"
+DEFAULT_CONTEXT_LINES = 2
 
 
 class ExplaidLlmApp(Application):
@@ -69,7 +74,20 @@ class ExplaidLlmApp(Application):
         self._assumption_signatures: Set[Tuple[str, int]] = set()
         self._llm_api_key: Optional[str] = None
         self._mus: Optional[UnsatisfiableSubset] = None
+        self._mus_strings: FrozenSet[str] = frozenset()
         self._model_tag: ModelTag = ModelTag.GPT_4O_MINI
+        self._hedge_model_tags: List[ModelTag] = []
+        self._hedge_delay: Optional[float] = None
+        self._preprocess_workers: int = 0
+        self._context_lines: int = DEFAULT_CONTEXT_LINES
+        self._limits = ResourceLimits()
+        self._fallback_assumption_signatures: Set[Tuple[str, int]] = set()
+        self._mus_workers: int = 0
+        self._mus_worker_addresses: List[str] = []
+        self._explanation_reuse = Flag(False)
+        self._reuse_threshold: float = DEFAULT_REUSE_THRESHOLD
+        self._log_json = Flag(False)
+        self._log_queue = Flag(False)
 
     def register_options(self, options: clingo.ApplicationOptions) -> None:
         group = "ExplaidLLM Options"
@@ -98,6 +116,103 @@ class ExplaidLlmApp(Application):
             self._parse_model_tag,
         )
 
+        options.add(
+            group,
+            "hedge-model",
+            "Additional LLM Model raced against the main model, the first valid explanation is used",
+            self._parse_hedge_model_tag,
+            multi=True,
+        )
+
+        options.add(
+            group,
+            "hedge-delay",
+            "Seconds to wait before sending each hedged request (without --hedge-model a duplicate request to the "
+            "main model is sent)",
+            self._parse_hedge_delay,
+        )
+
+        options.add_flag(
+            group,
+            "explanation-reuse",
+            "Reuse stored explanations of conflicts with the same structure instead of prompting the LLM",
+            self._explanation_reuse,
+        )
+
+        options.add(
+            group,
+            "reuse-threshold",
+            f"Minimal confidence for reusing a stored explanation (default: {DEFAULT_REUSE_THRESHOLD})",
+            self._parse_reuse_threshold,
+        )
+
+        options.add(
+            group,
+            "context-lines",
+            f"Number of source lines shown around each unsatisfiable constraint (default: {DEFAULT_CONTEXT_LINES})",
+            self._parse_context_lines,
+        )
+
+        options.add(
+            group,
+            "preprocess-workers",
+            "Number of processes used for preprocessing the files (and their includes) separately, unchanged files "
+            "are taken from an index (default: 0, sequential preprocessing)",
+            self._parse_preprocess_workers,
+        )
+
+        options.add(
+            group,
+            "mus-workers",
+            "Number of local worker processes used for computing the MUS (default: 0, no distribution)",
+            self._parse_mus_workers,
+        )
+
+        options.add(
+            group,
+            "mus-worker-address",
+            "Address of a remote MUS worker started with `explaidllm-worker` (format: <host>:<port>)",
+            self._parse_mus_worker_address,
+            multi=True,
+        )
+
+        options.add(
+            group,
+            "solve-memory-limit",
+            "Run the solver stages in a child process limited to this many MiB of resident memory",
+            self._parse_solve_memory_limit,
+        )
+
+        options.add(
+            group,
+            "solve-time-limit",
+            "Run the solver stages in a child process limited to this many seconds per stage",
+            self._parse_solve_time_limit,
+        )
+
+        options.add(
+            group,
+            "fallback-assumption-signature",
+            "Stricter assumption signature used for the MUS computation if a solver limit is hit "
+            "(format: <name>/<arity>)",
+            self._parse_fallback_assumption_signature,
+            multi=True,
+        )
+
+        options.add_flag(
+            group,
+            "log-json",
+            "Emit log messages as JSON lines",
+            self._log_json,
+        )
+
+        options.add_flag(
+            group,
+            "log-queue",
+            "Write log messages from a background thread",
+            self._log_queue,
+        )
+
     @staticmethod
     def _parse_signature(signature_string: str) -> Tuple[str, int]:
         match_result = re.match(r"^([a-zA-Z]+)/([0-9]+)$", signature_string)
@@ -118,6 +233,34 @@ class ExplaidLlmApp(Application):
         self._assumption_signatures.add((signature, arity))
         return True
 
+    def _parse_fallback_assumption_signature(self, assumption_signature: str) -> bool:
+        try:
+            signature = self._parse_signature(
+                assumption_signature.replace("=", "").strip()
+            )
+        except ValueError:
+            print(
+                "PARSE ERROR: Wrong signature format. The fallback assumption signatures have to follow the format "
+                "<assumption-name>/<arity>"
+            )
+            return False
+        self._fallback_assumption_signatures.add(signature)
+        return True
+
+    def _parse_solve_memory_limit(self, memory_limit: str) -> bool:
+        memory_limit_string = memory_limit.replace("=", "").strip()
+        if not memory_limit_string.isdigit():
+            return False
+        self._limits.memory = int(memory_limit_string) * 2**20
+        return True
+
+    def _parse_solve_time_limit(self, time_limit: str) -> bool:
+        try:
+            self._limits.time = float(time_limit.replace("=", "").strip())
+        except ValueError:
+            return False
+        return self._limits.time > 0
+
     def _parse_llm_api_key(self, llm_api_key: str) -> bool:
         self._llm_api_key = llm_api_key.replace("=", "").strip()
         return True
@@ -130,41 +273,121 @@ class ExplaidLlmApp(Application):
             return True
         return False
 
+    def _parse_hedge_model_tag(self, model_tag: str) -> bool:
+        model_tag_string = model_tag.replace("=", "").strip()
+        tags = {t.value.openai: t for t in ModelTag}
+        if model_tag_string in tags.keys():
+            self._hedge_model_tags.append(tags[model_tag_string])
+            return True
+        return False
+
+    def _parse_hedge_delay(self, hedge_delay: str) -> bool:
+        try:
+            self._hedge_delay = float(hedge_delay.replace("=", "").strip())
+        except ValueError:
+            return False
+        return self._hedge_delay >= 0
+
+    def _parse_reuse_threshold(self, reuse_threshold: str) -> bool:
+        try:
+            self._reuse_threshold = float(reuse_threshold.replace("=", "").strip())
+        except ValueError:
+            return False
+        return 0.0 <= self._reuse_threshold <= 1.0
+
+    def _create_llm(self) -> AbstractModel:
+        llm = OpenAIModel(model_tag=self._model_tag, api_key=self._llm_api_key)
+        if not self._hedge_model_tags and self._hedge_delay is None:
+            return llm
+        hedges = [
+            OpenAIModel(model_tag=tag, api_key=self._llm_api_key)
+            for tag in self._hedge_model_tags
+        ]
+        return HedgedModel(
+            models=[llm, *(hedges if hedges else [llm])],
+            hedge_delay=self._hedge_delay if self._hedge_delay is not None else 0.0,
+        )
+
+    def _parse_context_lines(self, context_lines: str) -> bool:
+        context_lines_string = context_lines.replace("=", "").strip()
+        if not context_lines_string.isdigit():
+            return False
+        self._context_lines = int(context_lines_string)
+        return True
+
+    def _parse_preprocess_workers(self, preprocess_workers: str) -> bool:
+        preprocess_workers_string = preprocess_workers.replace("=", "").strip()
+        if not preprocess_workers_string.isdigit():
+            return False
+        self._preprocess_workers = int(preprocess_workers_string)
+        return True
+
+    def _parse_mus_workers(self, mus_workers: str) -> bool:
+        mus_workers_string = mus_workers.replace("=", "").strip()
+        if not mus_workers_string.isdigit():
+            return False
+        self._mus_workers = int(mus_workers_string)
+        return True
+
+    def _parse_mus_worker_address(self, mus_worker_address: str) -> bool:
+        self._mus_worker_addresses.append(mus_worker_address.replace("=", "").strip())
+        return True
+
     def _highlight_mus(self, word: str) -> str:
         if self._mus is None:
             return word
-        mus_assumption_strings = [str(a.symbol) for a in self._mus.assumptions]
-        if word in mus_assumption_strings:
+        if word in self._mus_strings:
             return colored(
                 word, fg=COLOR_MUS, next_fg=COLOR_MESSAGE_TEXT, next_bg=COLOR_MESSAGE
             )
         return word
 
     @staticmethod
-    def is_satisfiable(files: Iterable[str]) -> bool:
-        control = clingo.Control()
-        for file in files:
-            logger.debug(f"Loading file: {file}")
-            control.load(file)
-        control.ground([("base", [])])
-        return control.solve().satisfiable
+    def render_constraint(
+        constraint: str,
+        location: Optional[Location],
+        sources: SourceCache,
+        context_lines: int = DEFAULT_CONTEXT_LINES,
+    ) -> str:
+        """Renders the source lines of a constraint with context, or just the constraint if its file can't be read"""
+        if location is None:
+            return render_code_line(line_number=0, content=constraint, width=100)
+        begin, end = location.begin, location.end
+        lines = sources.snippet(
+            begin.filename, begin.line, max(begin.line, end.line), context_lines
+        )
+        if not lines:
+            return render_code_line(
+                line_number=begin.line,
+                content=constraint,
+                filename=begin.filename,
+                width=100,
+            )
+        return render_code_snippet(lines, filename=begin.filename, width=100)
 
     def main(self, control: clingo.Control, files: Sequence[str]) -> None:
+        if self._log_json.flag or self._log_queue.flag:
+            setup_logger(
+                level=logger.level,
+                json_format=self._log_json.flag,
+                use_queue=self._log_queue.flag,
+            )
         load_dotenv()
-        logger.debug(f"Using ExplaidLLM version {version('explaidllm')}")
+        logger.debug("Using ExplaidLLM version %s", Lazy(version, "explaidllm"))
 
         sys.stdout.write("\n")
 
         loop = asyncio.get_event_loop()
 
         # STEP 1 --- Preprocessing
-        processed_files, ap = loop.run_until_complete(
+        processed_files, preprocessed_assumptions = loop.run_until_complete(
             self.execute_with_progress(
                 self.step_pre,
                 progress_label="Preprocessing files",
                 progress_emoji="⚙️",
                 assumption_signatures=self._assumption_signatures,
                 files=files,
+                preprocess_workers=self._preprocess_workers,
             )
         )
         sys.stdout.write("\n")
@@ -174,10 +397,14 @@ class ExplaidLlmApp(Application):
         sys.stdout.write("\n\n")
 
         # Skip explanation if the program is SAT
-        if ExplaidLlmApp.is_satisfiable(files):
+        if self._limits.enabled:
+            satisfiable = is_satisfiable_limited(files, self._limits)
+        else:
+            satisfiable = is_satisfiable(files)
+        if satisfiable:
             logger.info("Program is satisfiable, no explanation needed :)")
             return
-        if len(ap.assumptions) == 0:
+        if len(preprocessed_assumptions) == 0:
             logger.info(
                 "No assumptions for MUS computation found, either your program has no convertable facts or your "
                 "assumption signature filters are too restrictive."
@@ -185,21 +412,40 @@ class ExplaidLlmApp(Application):
             return
 
         # STEP 2 --- MUS Computation
-        mus = loop.run_until_complete(
-            self.execute_with_progress(
-                self.step_mus,
-                progress_label="Computing Minimal Unsatisfiable Subset",
-                progress_emoji="🔘",
-                program=processed_files,
-                ap=ap,
+        try:
+            mus, assumptions = loop.run_until_complete(
+                self.execute_with_progress(
+                    self.step_mus,
+                    progress_label="Computing Minimal Unsatisfiable Subset",
+                    progress_emoji="🔘",
+                    program=processed_files,
+                    assumptions=preprocessed_assumptions,
+                    mus_workers=self._mus_workers,
+                    mus_worker_addresses=self._mus_worker_addresses,
+                    limits=self._limits,
+                    files=files,
+                    fallback_assumption_signatures=self._fallback_assumption_signatures,
+                )
             )
-        )
+        except LimitExceeded as error:
+            logger.error(
+                "MUS computation exceeded the solver limits in every configuration (last: %s)",
+                error.report,
+            )
+            return
+        if mus is None:
+            # Only reachable if the satisfiability check hit a solver limit
+            logger.info("Program is satisfiable, no explanation needed :)")
+            return
         self._mus = mus
-        logger.debug(f"Found MUS: {mus}")
+        self._mus_strings = frozenset(
+            assumptions.iter_strings(a.literal for a in mus.assumptions)
+        )
+        logger.debug("Found MUS: %s", mus)
         sys.stdout.write("\n")
         sys.stdout.write(
             render_details(
-                [str(a.symbol) for a in mus.assumptions],
+                self._mus_strings,
                 width=100,
                 fg=COLOR_WHITE,
                 bg=COLOR_MUS,
@@ -208,49 +454,78 @@ class ExplaidLlmApp(Application):
         sys.stdout.write("\n\n")
 
         # STEP 3 --- UCS Computations
-        ucs, locations = loop.run_until_complete(
-            self.execute_with_progress(
-                self.step_ucs,
-                progress_label="Computing Unsatisfiable Constraints",
-                progress_emoji="⬅️",
-                files=files,
-                mus=mus,
+        try:
+            ucs, locations = loop.run_until_complete(
+                self.execute_with_progress(
+                    self.step_ucs,
+                    progress_label="Computing Unsatisfiable Constraints",
+                    progress_emoji="⬅️",
+                    files=files,
+                    mus=mus,
+                    assumptions=assumptions,
+                    limits=self._limits,
+                )
             )
-        )
-        logger.debug(f"Found Unsatisfiable Constraints:\n{ucs}")
-
-        c_id, uc = list(ucs.items())[0]
-        constraint = uc
-        position = locations.get(c_id).begin
-
-        sys.stdout.write(
-            render_code_line(
-                line_number=position.line,
-                content=constraint,
-                filename=position.filename,
-                width=100,
+        except LimitExceeded as error:
+            logger.warning(
+                "%s, explaining the MUS without its unsatisfiable constraints",
+                error.report,
             )
-        )
+            ucs, locations = {}, {}
+        logger.debug("Found Unsatisfiable Constraints:\n%s", ucs)
+
+        with SourceCache() as sources:
+            for c_id, constraint in ucs.items():
+                sys.stdout.write(
+                    self.render_constraint(
+                        constraint, locations.get(c_id), sources, self._context_lines
+                    )
+                )
         sys.stdout.write("\n")
 
-        # STEP 4 --- LLM Prompting
-        llm = OpenAIModel(model_tag=self._model_tag, api_key=self._llm_api_key)
-        result = loop.run_until_complete(
-            self.execute_with_progress(
-                self.step_llm,
-                progress_label=f"Prompting LLM ({self._model_tag.name})",
-                progress_emoji="🤖",
-                llm=llm,
-                assumptions=ap.assumptions,
-                mus=mus,
-                ucs=ucs.values(),
-            )
+        # STEP 4 --- LLM Prompting (skipped with reuse if a conflict of the same structure was explained before)
+        store = (
+            ExplanationStore(threshold=self._reuse_threshold)
+            if self._explanation_reuse.flag
+            else None
+        )
+        signature = ConflictSignature.from_conflict(
+            assumptions.iter_symbols(a.literal for a in mus.assumptions), ucs.values()
         )
+        explanation = store.lookup(signature) if store is not None else None
+        if explanation is not None:
+            logger.info("Reusing the explanation of a conflict with the same structure")
+        else:
+            llm = self._create_llm()
+            result = loop.run_until_complete(
+                self.execute_with_progress(
+                    self.step_llm,
+                    progress_label=f"Prompting LLM ({self._model_tag.name})",
+                    progress_emoji="🤖",
+                    llm=llm,
+                    assumptions=assumptions,
+                    mus=mus,
+                    ucs=ucs.values(),
+                )
+            )
 
-        loop.close()
+            if isinstance(llm, HedgedModel) and llm.last_outcome is not None:
+                logger.info(
+                    "Explanation provided by %s after %.2fs (%d requests sent, %d cancelled, %s tokens)",
+                    llm.last_outcome.winner,
+                    llm.last_outcome.latency,
+                    llm.last_outcome.launched,
+                    llm.last_outcome.cancelled,
+                    llm.last_outcome.usage.total_tokens
+                    if llm.last_outcome.usage is not None
+                    else "unknown",
+                )
 
-        result_json = json.loads(result, strict=False)
-        explanation = " ".join(result_json["explanation"].replace("\n", "").split())
+            explanation = ExplaidLlmApp.parse_explanation(result)
+            if store is not None:
+                store.add(signature, explanation)
+
+        loop.close()
 
         sys.stdout.write("\n")
 
@@ -262,6 +537,11 @@ class ExplaidLlmApp(Application):
 
         sys.stdout.write("\n\n")
 
+    @staticmethod
+    def parse_explanation(result: str) -> str:
+        result_json = json.loads(result, strict=False)
+        return " ".join(result_json["explanation"].replace("\n", "").split())
+
     @staticmethod
     async def execute_with_progress(
         function: Callable[P, Awaitable[T]],
@@ -279,76 +559,57 @@ class ExplaidLlmApp(Application):
     async def step_pre(
         files: Sequence[str],
         assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
-    ) -> Tuple[str, AssumptionPreprocessor]:
+        preprocess_workers: int = 0,
+    ) -> Tuple[str, AssumptionStore]:
         await asyncio.sleep(0.1)  # minimal sleep to make sure progress is drawn
-        assumption_filters = [
-            FilterSignature(name=name, arity=arity)
-            for (name, arity) in assumption_signatures
-        ]
-        assumption_filters = (
-            None if len(assumption_filters) == 0 else assumption_filters
+        return preprocess(
+            files, assumption_signatures, preprocess_workers=preprocess_workers
         )
-        ap = AssumptionPreprocessor(filters=assumption_filters)
-        result = None
-        if not files:
-            pass
-            logger.debug("Reading from -")
-            logger.warning("IMPLEMENT READING FROM STDIN HERE")
-        else:
-            logger.debug(f"Reading from {files[0]} {'...' if len(files) > 1 else ''}")
-            result = ap.process_files(list(files))
-            logger.debug(f"Processed Files:\n{result}")
-        return result, ap
 
     @staticmethod
     async def step_mus(
-        program: str, ap: AssumptionPreprocessor
-    ) -> Optional[UnsatisfiableSubset]:
+        program: str,
+        assumptions: AssumptionStore,
+        mus_workers: int = 0,
+        mus_worker_addresses: Sequence[str] = (),
+        limits: Optional[ResourceLimits] = None,
+        files: Sequence[str] = (),
+        fallback_assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+    ) -> Tuple[Optional[UnsatisfiableSubset], AssumptionStore]:
         await asyncio.sleep(0.1)  # minimal sleep to make sure progress is drawn
-        control = clingo.Control()
-        control.configuration.solve.models = 0
-        control.add("base", [], program)
-        control.ground([("base", [])])
-        cc = CoreComputer(control=control, assumption_set=ap.assumptions)
-        logger.debug(f"Solving program with assumptions: {ap.assumptions}")
-        with control.solve(
-            assumptions=list(ap.assumptions), yield_=True
-        ) as solve_handle:
-            result = solve_handle.get()
-            if result.satisfiable:
-                return None
-            elif len(solve_handle.core()) == 0:
-                logger.debug(
-                    f"No unsatisfiable core found, probably because of too restrictive assumption filters"
-                )
-                return UnsatisfiableSubset(set(), minimal=False)
-            else:
-                logger.debug("Computing MUS of UNSAT Program")
-                return cc.shrink(solve_handle.core())
+        if limits is not None and limits.enabled:
+            return compute_mus_limited(
+                program,
+                assumptions,
+                limits,
+                files=files,
+                fallback_assumption_signatures=fallback_assumption_signatures,
+                mus_workers=mus_workers,
+                mus_worker_addresses=mus_worker_addresses,
+            )
+        return compute_mus(
+            program,
+            assumptions,
+            mus_workers=mus_workers,
+            mus_worker_addresses=mus_worker_addresses,
+        )
 
     @staticmethod
     async def step_ucs(
-        files: Sequence[str], mus: UnsatisfiableSubset
-    ) -> Tuple[Dict[int, str], Dict[int, Location]]:
+        files: Sequence[str],
+        mus: UnsatisfiableSubset,
+        assumptions: AssumptionStore,
+        limits: Optional[ResourceLimits] = None,
+    ) -> Tuple[Dict[int, str], Dict[int, Optional[Location]]]:
         await asyncio.sleep(0.1)  # minimal sleep to make sure progress is drawn
-        mus_string = " ".join(
-            [f"{'' if a.sign else '-'}{a.symbol}" for a in mus.assumptions]
-        )
-        ucc = UnsatConstraintComputer()
-        ucc.parse_files(files)
-        unsatisfiable_constraints = ucc.get_unsat_constraints(
-            assumption_string=mus_string
-        )
-        locations = {
-            c_id: ucc.get_constraint_location(c_id)
-            for c_id in unsatisfiable_constraints.keys()
-        }
-        return unsatisfiable_constraints, locations
+        if limits is not None and limits.enabled:
+            return compute_ucs_limited(files, mus, assumptions, limits)
+        return compute_ucs(files, mus, assumptions)
 
     @staticmethod
     async def step_llm(
         llm: AbstractModel,
-        assumptions: Set[Tuple[Symbol, bool]],
+        assumptions: AssumptionStore,
         mus: UnsatisfiableSubset,
         ucs: Iterable[str],
     ) -> str:
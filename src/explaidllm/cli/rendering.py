@@ -2,11 +2,12 @@ import asyncio
 import sys
 from dataclasses import dataclass
 from enum import Enum
-from typing import Callable, Iterable, List, Optional, Union
+from typing import Callable, Iterable, List, Optional, Sequence, Union
 
 import cursor
 
 from ..spinner import get_spinner
+from ..utils.source import SourceLine
 
 
 class EscapeCode(Enum):
@@ -111,16 +112,23 @@ def render_code_line(
     filename: Optional[str] = None,
     width: Optional[int] = None,
 ) -> str:
-    string_line_number = colored(
-        f" {str(line_number).rjust(4)} ",
-        fg=shade(COLOR_WHITE, 0.4),
-        bg=shade(COLOR_GRAY, 0.2),
-    )
-    content_width = width - 6 if width is not None else len(content) + 2
-    content_padded = content.ljust(content_width)
-    string_content = colored(
-        f" {content_padded} ", fg=shade(COLOR_WHITE, 0.6), bg=shade(COLOR_GRAY, 0.3)
+    return render_code_snippet(
+        [SourceLine(number=line_number, content=content)],
+        filename=filename,
+        width=width,
     )
+
+
+def render_code_snippet(
+    lines: Sequence[SourceLine],
+    filename: Optional[str] = None,
+    width: Optional[int] = None,
+) -> str:
+    """Renders consecutive source lines, highlighted lines are drawn brighter than the surrounding context"""
+    if width is not None:
+        content_width = width - 6
+    else:
+        content_width = max((len(line.content) for line in lines), default=0) + 2
     if filename is None:
         line_heading = "\n"
     else:
@@ -138,8 +146,23 @@ def render_code_line(
         + colored(" " * (content_width + 2), bg=shade(COLOR_GRAY, 0.3))
         + "\n"
     )
-    line_content = " " + string_line_number + string_content + "\n"
-    return line_heading + line_padding + line_content + line_padding
+    line_contents = ""
+    for line in lines:
+        string_line_number = colored(
+            f" {str(line.number).rjust(4)} ",
+            fg=shade(COLOR_WHITE, 0.8 if line.highlighted else 0.4),
+            bg=shade(COLOR_GRAY, 0.2),
+        )
+        content = line.content
+        if len(content) > content_width:
+            content = content[: content_width - 1] + "…"
+        string_content = colored(
+            f" {content.ljust(content_width)} ",
+            fg=shade(COLOR_WHITE, 0.9 if line.highlighted else 0.6),
+            bg=shade(COLOR_GRAY, 0.3),
+        )
+        line_contents += " " + string_line_number + string_content + "\n"
+    return line_heading + line_padding + line_contents + line_padding
 
 
 def message_partitions(
@@ -0,0 +1,9 @@
+"""
+Explanation daemon and its thin client. The daemon itself lives in `explaidllm.daemon.server`, it is not imported here
+so that the client stays free of the heavy solver and LLM dependencies.
+"""
+
+from .client import DaemonClient
+from .protocol import default_socket_path
+
+__all__ = ["DaemonClient", "default_socket_path"]
@@ -0,0 +1,174 @@
+"""Thin client for the explanation daemon (only depends on the standard library)"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .protocol import (
+    DEFAULT_HOST,
+    EVENT_ACCEPTED,
+    EVENT_CANCELLED,
+    EVENT_ERROR,
+    EVENT_RESULT,
+    OP_AUTH,
+    OP_CANCEL,
+    OP_EXPLAIN,
+    OP_STATUS,
+    Message,
+    decode,
+    default_socket_path,
+    default_token_path,
+    encode,
+)
+
+
+class DaemonClient:
+    """
+    Blocking client connection to a running explanation daemon. Connections to a TCP daemon are authenticated with the
+    token the daemon wrote to `token_path`.
+    """
+
+    def __init__(
+        self,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        token_path: Optional[str] = None,
+    ):
+        if port is not None:
+            with open(
+                token_path if token_path is not None else default_token_path(),
+                "r",
+                encoding="utf-8",
+            ) as token_file:
+                token = token_file.read().strip()
+            self._socket = socket.create_connection((DEFAULT_HOST, port))
+            self._socket.sendall(encode({"op": OP_AUTH, "token": token}))
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.connect(
+                socket_path if socket_path is not None else default_socket_path()
+            )
+        self._file = self._socket.makefile("rb")
+
+    def __enter__(self) -> "DaemonClient":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._file.close()
+        self._socket.close()
+
+    def send(self, message: Message) -> None:
+        self._socket.sendall(encode(message))
+
+    def events(self) -> Iterator[Message]:
+        """Iterates over the messages sent by the daemon"""
+        for line in self._file:
+            yield decode(line)
+
+    def explain(
+        self,
+        files: Sequence[str],
+        assumption_signatures: Sequence[Tuple[str, int]] = (),
+        model: Optional[str] = None,
+    ) -> Message:
+        """Submits an explanation job and waits for its result event"""
+        self.send(
+            {
+                "op": OP_EXPLAIN,
+                "files": [os.path.abspath(f) for f in files],
+                "assumption_signatures": [list(s) for s in assumption_signatures],
+                "model": model,
+            }
+        )
+        for event in self.events():
+            if event["event"] == EVENT_ACCEPTED:
+                continue
+            return event
+        raise ConnectionError("Daemon closed the connection")
+
+    def cancel(self, job_id: int) -> None:
+        self.send({"op": OP_CANCEL, "job": job_id})
+
+    def status(self) -> Message:
+        self.send({"op": OP_STATUS})
+        return next(self.events())
+
+
+def _parse_signature(signature_string: str) -> Tuple[str, int]:
+    name, separator, arity = signature_string.rpartition("/")
+    if not separator or not name or not arity.isdigit():
+        raise argparse.ArgumentTypeError(
+            "The assumption signatures have to follow the format <assumption-name>/<arity>"
+        )
+    return name, int(arity)
+
+
+def _render(result: Message) -> str:
+    if result.get("satisfiable"):
+        return "Program is satisfiable, no explanation needed :)"
+    lines: List[str] = [f"MUS: {' '.join(result['mus'])}"]
+    for constraint in result["constraints"]:
+        lines.append(
+            f"{constraint['filename']}:{constraint['line']}: {constraint['constraint']}"
+        )
+    lines.append(result["explanation"])
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Requests an explanation from a running ExplaidLLM daemon"
+    )
+    parser.add_argument("files", nargs="+", help="Files of the ASP program")
+    parser.add_argument(
+        "--assumption-signature",
+        "-a",
+        action="append",
+        type=_parse_signature,
+        default=[],
+        help="Facts matching with this signature will be converted to assumptions (format: <name>/<arity>)",
+    )
+    parser.add_argument("--model", "-m", help="LLM Model")
+    parser.add_argument("--socket", help="Path of the daemon's Unix socket")
+    parser.add_argument("--port", type=int, help="Port of a daemon on localhost")
+    parser.add_argument(
+        "--token-file",
+        help="File holding the token of a daemon listening on --port (default: per-user runtime dir)",
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the raw result as JSON"
+    )
+    args = parser.parse_args()
+
+    try:
+        with DaemonClient(
+            socket_path=args.socket, port=args.port, token_path=args.token_file
+        ) as client:
+            result = client.explain(
+                args.files,
+                assumption_signatures=args.assumption_signature,
+                model=args.model,
+            )
+    except (ConnectionError, FileNotFoundError) as error:
+        sys.stderr.write(f"Could not reach the ExplaidLLM daemon: {error}\n")
+        sys.exit(2)
+
+    if args.json:
+        sys.stdout.write(json.dumps(result) + "\n")
+    elif result["event"] == EVENT_RESULT:
+        sys.stdout.write(_render(result) + "\n")
+    elif result["event"] == EVENT_CANCELLED:
+        sys.stderr.write("Explanation job was cancelled\n")
+    elif result["event"] == EVENT_ERROR:
+        sys.stderr.write(f"ERROR: {result.get('message')}\n")
+    sys.exit(0 if result["event"] == EVENT_RESULT else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Wire protocol of the explanation daemon: one JSON object per line"""
+
+import json
+import os
+import tempfile
+from typing import Any, Dict
+
+OP_EXPLAIN = "explain"
+OP_CANCEL = "cancel"
+OP_STATUS = "status"
+OP_AUTH = "auth"
+
+EVENT_ACCEPTED = "accepted"
+EVENT_RESULT = "result"
+EVENT_CANCELLED = "cancelled"
+EVENT_ERROR = "error"
+EVENT_STATUS = "status"
+
+DEFAULT_HOST = "127.0.0.1"
+STREAM_LIMIT = 2**24
+
+Message = Dict[str, Any]
+
+
+def default_socket_path() -> str:
+    """Per-user default path of the daemon socket"""
+    directory = os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())
+    return os.path.join(directory, f"explaidllm-{os.getuid()}.sock")
+
+
+def default_token_path() -> str:
+    """Per-user default path of the file holding the token clients of a TCP daemon authenticate with"""
+    directory = os.environ.get("XDG_RUNTIME_DIR", tempfile.gettempdir())
+    return os.path.join(directory, f"explaidllm-{os.getuid()}.token")
+
+
+def encode(message: Message) -> bytes:
+    """Encodes a message as a single JSON line"""
+    return json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def decode(line: bytes) -> Message:
+    """Decodes a single JSON line, raises a ValueError if it isn't a JSON object"""
+    message = json.loads(line.decode("utf-8"))
+    if not isinstance(message, dict):
+        raise ValueError("Messages have to be JSON objects")
+    return message
@@ -0,0 +1,435 @@
+"""Long-running explanation daemon keeping clingo, clingexplaid and the LLM clients warm"""
+
+import argparse
+import asyncio
+import hmac
+import itertools
+import logging
+import os
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional, Set
+
+from dotenv import load_dotenv
+
+from ..api import explain
+from ..llms.models import AbstractModel, ModelTag, OpenAIModel
+from ..llms.reuse import DEFAULT_REUSE_THRESHOLD, ExplanationStore
+from ..utils.logging import DEFAULT_LOGGER_NAME, setup_logger
+from .protocol import (
+    DEFAULT_HOST,
+    EVENT_ACCEPTED,
+    EVENT_CANCELLED,
+    EVENT_ERROR,
+    EVENT_RESULT,
+    EVENT_STATUS,
+    OP_AUTH,
+    OP_CANCEL,
+    OP_EXPLAIN,
+    OP_STATUS,
+    STREAM_LIMIT,
+    Message,
+    decode,
+    default_socket_path,
+    default_token_path,
+    encode,
+)
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+
+@dataclass
+class Job:
+    """An explanation job waiting in or taken from the job queue"""
+
+    job_id: int
+    request: Message
+    future: asyncio.Future
+    task: Optional[asyncio.Task] = None
+
+
+@dataclass
+class _Connection:
+    writer: asyncio.StreamWriter
+    jobs: Set[int] = field(default_factory=set)
+
+
+class ExplanationDaemon:
+    """
+    Accepts explanation jobs over a Unix socket (or localhost TCP port) and runs them through the explanation pipeline
+    (`explaidllm.api.explain`). At most `concurrency` jobs run at the same time, further jobs wait in a bounded queue. Jobs are
+    cancelled on request or when the submitting client disconnects. A job cancelled while a solver stage is running
+    stops as soon as that stage returns.
+
+    The Unix socket is only accessible by its owner. As any local user can connect to a TCP port, TCP clients have to
+    send the token the daemon writes to a file only readable by its owner first.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 2,
+        max_queued: int = 64,
+        llm_api_key: Optional[str] = None,
+        store: Optional[ExplanationStore] = None,
+    ):
+        self._concurrency = concurrency
+        self._queue: asyncio.Queue[Job] = asyncio.Queue(maxsize=max_queued)
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="explaidllm-job"
+        )
+        self._llm_api_key = llm_api_key
+        self._store = store
+        self._models: Dict[ModelTag, AbstractModel] = {}
+        self._jobs: Dict[int, Job] = {}
+        self._job_ids = itertools.count(1)
+        self._running = 0
+        self._token: Optional[str] = None
+
+    def _model(self, model_tag: ModelTag) -> AbstractModel:
+        model = self._models.get(model_tag)
+        if model is None:
+            model = OpenAIModel(model_tag=model_tag, api_key=self._llm_api_key)
+            self._models[model_tag] = model
+        return model
+
+    @staticmethod
+    def _validate_explain(request: Message) -> None:
+        """Raises a ValueError if the explain request can't be run, so it is rejected before it is queued"""
+        files = request.get("files")
+        if (
+            not isinstance(files, list)
+            or not files
+            or not all(isinstance(f, str) for f in files)
+        ):
+            raise ValueError("'files' has to be a non-empty list of paths")
+        model = request.get("model")
+        if model is not None and model not in {t.value.openai for t in ModelTag}:
+            raise ValueError(f"Unknown model: {model}")
+        signatures = request.get("assumption_signatures", [])
+        if not isinstance(signatures, list) or not all(
+            isinstance(s, list)
+            and len(s) == 2
+            and isinstance(s[0], str)
+            and isinstance(s[1], int)
+            for s in signatures
+        ):
+            raise ValueError(
+                "'assumption_signatures' has to be a list of [<name>, <arity>] pairs"
+            )
+
+    async def _explain(self, request: Message) -> Message:
+        tags = {t.value.openai: t for t in ModelTag}
+        model_tag = tags[request.get("model") or ModelTag.GPT_4O_MINI.value.openai]
+        assumption_signatures = {
+            (name, arity) for name, arity in request.get("assumption_signatures", [])
+        }
+        result = await explain(
+            request["files"],
+            assumption_signatures=assumption_signatures,
+            llm=self._model(model_tag),
+            executor=self._executor,
+            store=self._store,
+        )
+        if result.satisfiable:
+            return {"satisfiable": True}
+        return {
+            "satisfiable": False,
+            "mus": [str(symbol) for symbol, _ in result.mus],
+            "constraints": [
+                {
+                    "constraint": uc.constraint,
+                    "filename": uc.location.begin.filename if uc.location else None,
+                    "line": uc.location.begin.line if uc.location else None,
+                }
+                for uc in result.constraints
+            ],
+            "explanation": result.explanation,
+            "reused": result.reused,
+            "timings": asdict(result.timings),
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.future.done():
+                # Cancelled while waiting in the queue
+                continue
+            self._running += 1
+            job.task = asyncio.ensure_future(self._explain(job.request))
+            await asyncio.wait({job.task})
+            self._running -= 1
+            if job.future.done():
+                continue
+            if job.task.cancelled():
+                job.future.cancel()
+            elif job.task.exception() is not None:
+                job.future.set_exception(job.task.exception())
+            else:
+                job.future.set_result(job.task.result())
+
+    def submit(self, request: Message) -> Job:
+        """Puts an explanation job into the queue (raises asyncio.QueueFull if the queue is full)"""
+        job = Job(
+            job_id=next(self._job_ids),
+            request=request,
+            future=asyncio.get_running_loop().create_future(),
+        )
+        self._queue.put_nowait(job)
+        self._jobs[job.job_id] = job
+        job.future.add_done_callback(lambda _: self._jobs.pop(job.job_id, None))
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels a queued or running job"""
+        job = self._jobs.get(job_id)
+        if job is None:
+            return False
+        if job.task is not None:
+            job.task.cancel()
+        job.future.cancel()
+        return True
+
+    def status(self) -> Message:
+        return {
+            "running": self._running,
+            "queued": self._queue.qsize(),
+            "concurrency": self._concurrency,
+        }
+
+    @staticmethod
+    async def _send(connection: _Connection, message: Message) -> None:
+        connection.writer.write(encode(message))
+        await connection.writer.drain()
+
+    async def _reply_when_done(self, connection: _Connection, job: Job) -> None:
+        try:
+            result = await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            if not job.future.cancelled():
+                raise
+            message = {"event": EVENT_CANCELLED, "job": job.job_id}
+        except Exception as error:  # pylint: disable=broad-except
+            message = {"event": EVENT_ERROR, "job": job.job_id, "message": str(error)}
+        else:
+            message = {"event": EVENT_RESULT, "job": job.job_id, **result}
+        finally:
+            connection.jobs.discard(job.job_id)
+        try:
+            await self._send(connection, message)
+        except ConnectionError:
+            logger.debug("Client of job %d disconnected before the reply", job.job_id)
+
+    async def _handle_request(self, connection: _Connection, request: Message) -> None:
+        operation = request.get("op")
+        if operation == OP_EXPLAIN:
+            self._validate_explain(request)
+            try:
+                job = self.submit(request)
+            except asyncio.QueueFull:
+                await self._send(
+                    connection, {"event": EVENT_ERROR, "message": "Job queue is full"}
+                )
+                return
+            connection.jobs.add(job.job_id)
+            await self._send(connection, {"event": EVENT_ACCEPTED, "job": job.job_id})
+            asyncio.ensure_future(self._reply_when_done(connection, job))
+        elif operation == OP_CANCEL:
+            job_id = request.get("job")
+            if not isinstance(job_id, int) or isinstance(job_id, bool):
+                raise ValueError("'job' has to be a job id")
+            if not self.cancel(job_id):
+                await self._send(
+                    connection,
+                    {"event": EVENT_ERROR, "message": f"Unknown job: {job_id}"},
+                )
+        elif operation == OP_STATUS:
+            await self._send(connection, {"event": EVENT_STATUS, **self.status()})
+        else:
+            await self._send(
+                connection,
+                {"event": EVENT_ERROR, "message": f"Unknown operation: {operation}"},
+            )
+
+    async def _authenticate(
+        self, connection: _Connection, reader: asyncio.StreamReader
+    ) -> bool:
+        """Checks that the first request of a TCP connection carries the daemon's token"""
+        try:
+            request = decode(await reader.readline())
+            token = request.get("token")
+            if (
+                request.get("op") == OP_AUTH
+                and isinstance(token, str)
+                and hmac.compare_digest(
+                    token.encode("utf-8"), self._token.encode("utf-8")
+                )
+            ):
+                return True
+        except ValueError:
+            pass
+        await self._send(
+            connection, {"event": EVENT_ERROR, "message": "Authentication failed"}
+        )
+        return False
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        connection = _Connection(writer=writer)
+        try:
+            if self._token is not None and not await self._authenticate(
+                connection, reader
+            ):
+                return
+            while line := await reader.readline():
+                try:
+                    request = decode(line)
+                except ValueError:
+                    await self._send(
+                        connection,
+                        {"event": EVENT_ERROR, "message": "Malformed request"},
+                    )
+                    continue
+                try:
+                    await self._handle_request(connection, request)
+                except (KeyError, TypeError, ValueError) as error:
+                    # Invalid requests are rejected without affecting the other jobs of the client
+                    await self._send(
+                        connection,
+                        {"event": EVENT_ERROR, "message": f"Invalid request: {error}"},
+                    )
+        except ConnectionError:
+            pass
+        finally:
+            # Jobs of disconnected clients are of no use anymore
+            for job_id in list(connection.jobs):
+                self.cancel(job_id)
+            writer.close()
+
+    @staticmethod
+    def _write_token(token_path: str) -> str:
+        """Writes a new random token to a file only readable by the owner"""
+        token = secrets.token_hex(32)
+        if os.path.lexists(token_path):
+            os.remove(token_path)
+        descriptor = os.open(
+            token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_NOFOLLOW, 0o600
+        )
+        with os.fdopen(descriptor, "w", encoding="utf-8") as token_file:
+            token_file.write(token)
+        return token
+
+    async def serve(
+        self,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        token_path: Optional[str] = None,
+    ) -> None:
+        """
+        Serves on the Unix socket `socket_path` or, if `port` is given, on localhost:`port`. In TCP mode clients
+        authenticate with the token written to `token_path`.
+        """
+        workers = [
+            asyncio.ensure_future(self._worker()) for _ in range(self._concurrency)
+        ]
+        if port is not None:
+            if token_path is None:
+                token_path = default_token_path()
+            self._token = self._write_token(token_path)
+            server = await asyncio.start_server(
+                self._handle_connection, DEFAULT_HOST, port, limit=STREAM_LIMIT
+            )
+            logger.info(
+                "ExplaidLLM daemon listening on %s:%d (token in %s)",
+                DEFAULT_HOST,
+                port,
+                token_path,
+            )
+        else:
+            if socket_path is None:
+                socket_path = default_socket_path()
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            # The socket is created with restricted permissions, so nobody can connect before the chmod
+            umask = os.umask(0o077)
+            try:
+                server = await asyncio.start_unix_server(
+                    self._handle_connection, socket_path, limit=STREAM_LIMIT
+                )
+            finally:
+                os.umask(umask)
+            os.chmod(socket_path, 0o600)
+            logger.info("ExplaidLLM daemon listening on %s", socket_path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            if token_path is not None and port is not None:
+                try:
+                    os.remove(token_path)
+                except OSError:
+                    pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Long-running ExplaidLLM daemon accepting explanation jobs"
+    )
+    parser.add_argument(
+        "--socket", help="Path of the Unix socket (default: per-user runtime dir)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Listen on localhost:<port> instead of a Unix socket, clients authenticate with a token",
+    )
+    parser.add_argument(
+        "--token-file",
+        help="File the token for --port is written to (default: per-user runtime dir)",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=2, help="Maximum number of parallel jobs"
+    )
+    parser.add_argument(
+        "--max-queued", type=int, default=64, help="Maximum number of waiting jobs"
+    )
+    parser.add_argument("--llm-api-key", "-k", help="API Key for prompting the LLM")
+    parser.add_argument(
+        "--explanation-reuse",
+        action="store_true",
+        help="Reuse stored explanations of conflicts with the same structure instead of prompting the LLM",
+    )
+    parser.add_argument(
+        "--reuse-threshold",
+        type=float,
+        default=DEFAULT_REUSE_THRESHOLD,
+        help="Minimal confidence for reusing a stored explanation",
+    )
+    args = parser.parse_args()
+
+    setup_logger(level=logging.INFO)
+    load_dotenv()
+    daemon = ExplanationDaemon(
+        concurrency=args.concurrency,
+        max_queued=args.max_queued,
+        llm_api_key=args.llm_api_key,
+        store=ExplanationStore(threshold=args.reuse_threshold)
+        if args.explanation_reuse
+        else None,
+    )
+    try:
+        asyncio.run(
+            daemon.serve(
+                socket_path=args.socket, port=args.port, token_path=args.token_file
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
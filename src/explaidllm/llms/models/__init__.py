@@ -1,5 +1,14 @@
-from .base import AbstractModel
+from .base import AbstractModel, Usage
+from .hedged import HedgedModel, HedgeOutcome
 from .openai import OpenAIModel
 from .tags import ModelTag, Tag
 
-__all__ = ["AbstractModel", "OpenAIModel", "ModelTag", "Tag"]
+__all__ = [
+    "AbstractModel",
+    "HedgedModel",
+    "HedgeOutcome",
+    "OpenAIModel",
+    "ModelTag",
+    "Tag",
+    "Usage",
+]
@@ -1,11 +1,31 @@
 """Abstract base language model wrapper"""
 
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Optional, Tuple
 
 from ..templates import Template
 from .tags import ModelTag
 
 
+@dataclass
+class Usage:
+    """Token usage of a single language model request"""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def __add__(self, other: "Usage") -> "Usage":
+        return Usage(
+            input_tokens=self.input_tokens + other.input_tokens,
+            output_tokens=self.output_tokens + other.output_tokens,
+        )
+
+
 class AbstractModel(ABC):
     """Abstract base class for all language model wrappers"""
 
@@ -22,6 +42,12 @@ class AbstractModel(ABC):
     async def prompt(self, instructions_string: str, input_string: str) -> str:
         """Prompts the language model with the given input string"""
 
+    async def prompt_with_usage(
+        self, instructions_string: str, input_string: str
+    ) -> Tuple[str, Optional[Usage]]:
+        """Prompts the language model and also returns the token usage if the model reports it"""
+        return await self.prompt(instructions_string, input_string), None
+
     @abstractmethod
     async def prompt_template(self, template: Template) -> str:
         """Explains an explanation graph"""
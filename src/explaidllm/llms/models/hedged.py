@@ -0,0 +1,154 @@
+"""Composite model hedging requests over several language models"""
+
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from ...utils.logging import DEFAULT_LOGGER_NAME
+from ..templates import Template
+from .base import AbstractModel, Usage
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+
+@dataclass
+class HedgeOutcome:
+    """
+    Record of a hedged request: which model won (None if none did), how long it took and what it cost. The usage adds
+    up all completed requests including the ones whose output was invalid, cancelled requests report no usage.
+    """
+
+    winner: Optional[str]
+    latency: float
+    launched: int
+    cancelled: int = 0
+    usage: Optional[Usage] = None
+
+
+class HedgedModel(AbstractModel):
+    """
+    Sends the same prompt to several models, starting the i-th request `hedge_delay * i` seconds after the first one
+    (or right away if all running requests failed). The first output containing a valid JSON explanation wins and
+    the remaining requests are cancelled. Passing the same model twice hedges with a duplicate request, a delay of 0
+    races all models against each other.
+    """
+
+    def __init__(self, models: Sequence[AbstractModel], hedge_delay: float = 0.0):
+        if not models:
+            raise ValueError("HedgedModel needs at least one model")
+        self._models: List[AbstractModel] = list(models)
+        self._hedge_delay = hedge_delay
+        self.model_tag: str = "|".join(m.model_tag for m in self._models)
+        self.last_outcome: Optional[HedgeOutcome] = None
+
+    @property
+    def model_tag_key(self) -> str:
+        return self._models[0].model_tag_key
+
+    @staticmethod
+    def is_valid(output: str) -> bool:
+        """Checks if the output is a JSON object containing an explanation"""
+        try:
+            output_json = json.loads(output, strict=False)
+        except ValueError:
+            return False
+        return isinstance(output_json, dict) and "explanation" in output_json
+
+    async def prompt(self, instructions_string: str, input_string: str) -> str:
+        output, _ = await self.prompt_with_usage(instructions_string, input_string)
+        return output
+
+    async def prompt_with_usage(
+        self, instructions_string: str, input_string: str
+    ) -> Tuple[str, Optional[Usage]]:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        pending: Set[asyncio.Future] = set()
+        task_models: Dict[asyncio.Future, AbstractModel] = {}
+        launched = 0
+        usage: Optional[Usage] = None
+        last_error: Optional[BaseException] = None
+
+        def record(winner: Optional[str]) -> HedgeOutcome:
+            self.last_outcome = HedgeOutcome(
+                winner=winner,
+                latency=loop.time() - start,
+                launched=launched,
+                cancelled=len(pending),
+                usage=usage,
+            )
+            logger.debug("Hedged request outcome: %s", self.last_outcome)
+            return self.last_outcome
+
+        def launch() -> None:
+            nonlocal launched
+            model = self._models[launched]
+            task = asyncio.ensure_future(
+                model.prompt_with_usage(instructions_string, input_string)
+            )
+            task_models[task] = model
+            pending.add(task)
+            launched += 1
+            logger.debug("Hedged request %d sent to %s", launched, model.model_tag)
+
+        try:
+            launch()
+            while pending or launched < len(self._models):
+                if not pending:
+                    launch()
+                    continue
+                timeout = None
+                if launched < len(self._models):
+                    timeout = max(
+                        0.0, start + self._hedge_delay * launched - loop.time()
+                    )
+                done, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    launch()
+                    continue
+                winner: Optional[Tuple[asyncio.Future, str]] = None
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        logger.debug(
+                            "Hedged request to %s failed: %s",
+                            task_models[task].model_tag,
+                            last_error,
+                        )
+                        continue
+                    # Every completed request is paid for, whether it wins or not
+                    output, task_usage = task.result()
+                    if task_usage is not None:
+                        usage = task_usage if usage is None else usage + task_usage
+                    if not self.is_valid(output):
+                        logger.debug(
+                            "Hedged request to %s returned no valid explanation",
+                            task_models[task].model_tag,
+                        )
+                    elif winner is None:
+                        winner = (task, output)
+                if winner is not None:
+                    record(task_models[winner[0]].model_tag)
+                    return winner[1], usage
+        finally:
+            for task in pending:
+                task.cancel()
+
+        record(None)
+        raise RuntimeError(
+            "None of the hedged models returned a valid explanation"
+        ) from last_error
+
+    async def prompt_template(self, template: Template) -> str:
+        return await self.prompt(
+            instructions_string=template.compose_instructions(),
+            input_string=template.compose_input(),
+        )
+
+    @staticmethod
+    def transform_output(unfiltered_output: str) -> str:
+        return unfiltered_output
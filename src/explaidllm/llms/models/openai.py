@@ -1,12 +1,12 @@
 """Wrapper for the OpenAI ChatGPT model"""
 
 import os
-from typing import Optional
+from typing import Optional, Tuple
 
 from openai import AsyncOpenAI
 
 from ..templates import Template
-from .base import AbstractModel
+from .base import AbstractModel, Usage
 from .tags import ModelTag
 
 
@@ -23,12 +23,24 @@ class OpenAIModel(AbstractModel):
         self._client = AsyncOpenAI(api_key=openai_api_key)
 
     async def prompt(self, instructions_string: str, input_string: str) -> str:
+        output, _ = await self.prompt_with_usage(instructions_string, input_string)
+        return output
+
+    async def prompt_with_usage(
+        self, instructions_string: str, input_string: str
+    ) -> Tuple[str, Optional[Usage]]:
         response = await self._client.responses.create(
             model=self.model_tag,
             instructions=instructions_string,
             input=input_string,
         )
-        return OpenAIModel.transform_output(response.output_text)
+        usage = None
+        if response.usage is not None:
+            usage = Usage(
+                input_tokens=response.usage.input_tokens,
+                output_tokens=response.usage.output_tokens,
+            )
+        return OpenAIModel.transform_output(response.output_text), usage
 
     async def prompt_template(self, template: Template) -> str:
         return await self.prompt(
@@ -0,0 +1,221 @@
+"""Reuse of explanations across conflicts with the same structure"""
+
+import hashlib
+import json
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from clingo import Symbol, SymbolType
+
+from ..utils.cache import CACHE_DIRECTORY, write_json
+from ..utils.logging import DEFAULT_LOGGER_NAME
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+PLACEHOLDER = "⟨{}⟩"
+PLACEHOLDER_RE = re.compile(r"⟨(C[0-9]+(?:\|C[0-9]+)*)⟩")
+# Numbers, strings and constants (identifiers that are not followed by an argument list)
+CONSTANT_RE = re.compile(r'(?<![\w⟨|])-?[0-9]+\b|"(?:[^"\\]|\\.)*"|\b[a-z_]\w*\b(?!\()')
+
+DEFAULT_STORE_PATH = CACHE_DIRECTORY / "explanations.json"
+DEFAULT_REUSE_THRESHOLD = 0.8
+
+# (argument position, constant) -> placeholder id
+Bindings = Dict[Tuple[str, str], str]
+
+
+def _abstract_term(term: Symbol, position: str, bindings: Bindings) -> str:
+    if term.type == SymbolType.Function and term.arguments:
+        arguments = ",".join(
+            _abstract_term(a, f"{position}/{i}", bindings)
+            for i, a in enumerate(term.arguments)
+        )
+        return f"{'' if term.positive else '-'}{term.name}({arguments})"
+    binding = (position, str(term))
+    if binding not in bindings:
+        bindings[binding] = f"C{len(bindings)}"
+    return PLACEHOLDER.format(bindings[binding])
+
+
+def _abstract_atom(atom: Symbol, bindings: Bindings) -> str:
+    if atom.type != SymbolType.Function or not atom.arguments:
+        return str(atom)
+    position = f"{atom.name}/{len(atom.arguments)}"
+    arguments = ",".join(
+        _abstract_term(a, f"{position}/{i}", bindings)
+        for i, a in enumerate(atom.arguments)
+    )
+    return f"{'' if atom.positive else '-'}{atom.name}({arguments})"
+
+
+def _abstract_text(text: str, placeholders: Dict[str, List[str]]) -> Tuple[str, int]:
+    """
+    Replaces all constants of the conflict in the text by their placeholders. Constants bound at several argument
+    positions are replaced by a placeholder listing all alternatives. Returns the new text and the number of
+    replacements.
+    """
+    replaced = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal replaced
+        alternatives = placeholders.get(match.group(0))
+        if alternatives is None:
+            return match.group(0)
+        replaced += 1
+        return PLACEHOLDER.format("|".join(alternatives))
+
+    return CONSTANT_RE.sub(replace, text), replaced
+
+
+@dataclass
+class ConflictSignature:
+    """
+    Abstraction of a conflict (MUS and unsatisfiable constraints) where the constants of the MUS atoms are replaced by
+    placeholders, one per argument position and value. Conflicts that only differ in their constants share the same
+    `key`.
+    """
+
+    key: str
+    values: Dict[str, str]
+    atoms: List[Tuple[str, str]]
+
+    @classmethod
+    def from_conflict(
+        cls, mus: Iterable[Tuple[Symbol, bool]], constraints: Iterable[str]
+    ) -> "ConflictSignature":
+        # Order the atoms by their own constant pattern first, so equal conflicts get the same placeholders
+        ordered = sorted(mus, key=lambda a: (_abstract_atom(a[0], {}), not a[1], a[0]))
+        bindings: Bindings = {}
+        atoms = [
+            (str(atom), f"{'' if sign else 'not '}{_abstract_atom(atom, bindings)}")
+            for atom, sign in ordered
+        ]
+        signature = cls(
+            key="",
+            values={p: value for (_, value), p in bindings.items()},
+            atoms=atoms,
+        )
+        abstract_constraints = sorted(
+            _abstract_text(" ".join(c.split()), signature.placeholders)[0]
+            for c in constraints
+        )
+        signature.key = (
+            "; ".join(a for _, a in atoms) + " || " + " || ".join(abstract_constraints)
+        )
+        return signature
+
+    @property
+    def placeholders(self) -> Dict[str, List[str]]:
+        """Placeholder ids of every constant of the conflict"""
+        placeholders: Dict[str, List[str]] = {}
+        for placeholder, value in self.values.items():
+            placeholders.setdefault(value, []).append(placeholder)
+        return placeholders
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.key.encode("utf-8")).hexdigest()
+
+    def abstract(self, explanation: str) -> Tuple[str, float]:
+        """
+        Turns an explanation of this conflict into a template. Constants inside the MUS atoms of the explanation are
+        replaced safely, every standalone constant that was replaced (e.g. a number in the text or a word that happens
+        to equal a constant) reduces the confidence, as it can't be told whether it refers to the conflict.
+        """
+        template = explanation
+        exact = 0
+        for concrete, abstract in sorted(self.atoms, key=lambda a: -len(a[0])):
+            abstract_atom = abstract.removeprefix("not ")
+            exact += template.count(concrete) * len(
+                PLACEHOLDER_RE.findall(abstract_atom)
+            )
+            template = template.replace(concrete, abstract_atom)
+        template, replaced = _abstract_text(template, self.placeholders)
+        total = exact + replaced
+        return template, 1.0 if total == 0 else exact / total
+
+    def instantiate(self, template: str) -> Optional[str]:
+        """
+        Fills the placeholders of a template with the constants of this conflict. Placeholders with several
+        alternatives are only filled if all alternatives have the same value in this conflict, otherwise None is
+        returned as it can't be told which value is meant.
+        """
+        ambiguous = False
+
+        def replace(match: re.Match) -> str:
+            nonlocal ambiguous
+            values = {self.values.get(p) for p in match.group(1).split("|")}
+            if len(values) != 1 or None in values:
+                ambiguous = True
+                return match.group(0)
+            return values.pop()
+
+        explanation = PLACEHOLDER_RE.sub(replace, template)
+        return None if ambiguous else explanation
+
+
+class ExplanationStore:
+    """
+    Explanation templates keyed by conflict signatures, persisted as JSON at `path` (in memory only if no path is
+    given).
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = DEFAULT_STORE_PATH,
+        threshold: float = DEFAULT_REUSE_THRESHOLD,
+    ):
+        self._path = Path(path) if path is not None else None
+        self._threshold = threshold
+        self._entries: Optional[Dict[str, Dict]] = None
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is None:
+            self._entries = {}
+            if self._path is not None and self._path.exists():
+                try:
+                    with open(self._path, "r", encoding="utf-8") as store_file:
+                        self._entries = json.load(store_file)
+                except (OSError, ValueError) as error:
+                    logger.warning("Ignoring unreadable explanation store: %s", error)
+        return self._entries
+
+    def _save(self) -> None:
+        if self._path is None:
+            return
+        write_json(self._path, self._entries)
+
+    def lookup(self, signature: ConflictSignature) -> Optional[str]:
+        """Returns the re-instantiated explanation of a structurally identical conflict if confident enough"""
+        entry = self._load().get(signature.digest)
+        if entry is None or entry["key"] != signature.key:
+            return None
+        if entry["confidence"] < self._threshold:
+            logger.debug(
+                "Stored explanation below confidence threshold (%.2f < %.2f)",
+                entry["confidence"],
+                self._threshold,
+            )
+            return None
+        explanation = signature.instantiate(entry["template"])
+        if explanation is None:
+            logger.debug(
+                "Stored explanation refers to constants that differ in this conflict"
+            )
+        return explanation
+
+    def add(self, signature: ConflictSignature, explanation: str) -> None:
+        """Stores the explanation of a conflict as a template for conflicts of the same structure"""
+        template, confidence = signature.abstract(explanation)
+        self._load()[signature.digest] = {
+            "key": signature.key,
+            "template": template,
+            "confidence": confidence,
+        }
+        try:
+            self._save()
+        except OSError as error:
+            logger.warning("Could not write explanation store: %s", error)
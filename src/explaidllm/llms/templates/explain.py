@@ -1,11 +1,11 @@
 """Basic Explanation Prompt Template"""
 
 from pathlib import Path
-from typing import Iterable, Set, Tuple
+from typing import Iterable
 
 from clingexplaid.mus.core_computer import UnsatisfiableSubset
-from clingo import Symbol
 
+from ...utils.assumptions import AssumptionStore
 from .base import Template
 
 PROMPT_FILE_INSTRUCTIONS = "prompt_templates/explain_instructions.txt"
@@ -18,12 +18,12 @@ class ExplainTemplate(Template):
     def __init__(
         self,
         program: str,
-        assumptions: Set[Tuple[Symbol, bool]],
+        assumptions: AssumptionStore,
         mus: UnsatisfiableSubset,
         unsatisfiable_constraints: Iterable[str],
     ):
         self._program: str = program
-        self._assumptions: Set[Tuple[Symbol, bool]] = assumptions
+        self._assumptions: AssumptionStore = assumptions
         self._mus: UnsatisfiableSubset = mus
         self._unsatisfiable_constraints = unsatisfiable_constraints
 
@@ -40,9 +40,17 @@ class ExplainTemplate(Template):
             Path(__file__).parent / PROMPT_FILE_INPUT, "r", encoding="utf-8"
         ) as prompt_file:
             prompt_template = prompt_file.read()
-        p_assumptions = ", ".join([f"({str(a[0])},{a[1]})" for a in self._assumptions])
+        p_assumptions = ", ".join(
+            [
+                f"({self._assumptions.string(a)},{AssumptionStore.sign(a)})"
+                for a in self._assumptions
+            ]
+        )
         p_mus = ", ".join(
-            [f"({str(a.symbol)},{a.sign})" for a in self._mus.assumptions]
+            [
+                f"({self._assumptions.string(a.literal)},{a.sign})"
+                for a in self._mus.assumptions
+            ]
         )
         p_ucs = ", ".join([f"'{uc}'" for uc in self._unsatisfiable_constraints])
         prompt = prompt_template.format(
@@ -0,0 +1,4 @@
+from .coordinator import DistributedCoreComputer
+from .worker import MusWorker, serve, serve_socket
+
+__all__ = ["DistributedCoreComputer", "MusWorker", "serve", "serve_socket"]
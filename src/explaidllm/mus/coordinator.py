@@ -0,0 +1,185 @@
+"""Coordinator side of the distributed MUS computation"""
+
+import logging
+import math
+import multiprocessing
+import socket
+from typing import List, Optional, Sequence, Set, Tuple
+
+from clingo import Symbol
+
+from ..utils.logging import DEFAULT_LOGGER_NAME, ChildLogForwarder
+from .protocol import (
+    OP_CHECK,
+    OP_CLOSE,
+    OP_INIT,
+    Connection,
+    Message,
+    SocketConnection,
+    parse_address,
+)
+from .worker import serve_child
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+
+class DistributedCoreComputer:
+    """
+    Shrinks an unsatisfiable core to a minimal unsatisfiable subset by distributing the satisfiability checks of the
+    deletion-based MUS algorithm over local worker processes and remote workers.
+
+    The core is split into partitions and every worker checks whether the core stays unsatisfiable without one of
+    them. Removable partitions are dropped (the remaining set is refined to the returned core), while partitions of
+    a single necessary assumption are kept for good. Partitions are halved until every remaining assumption is
+    known to be necessary.
+    """
+
+    def __init__(
+        self,
+        program: str,
+        local_workers: int = 0,
+        remote_workers: Sequence[str] = (),
+    ):
+        self._program = program
+        self._connections: List[Connection] = []
+        self._processes: List[multiprocessing.Process] = []
+        self._log_forwarder: Optional[ChildLogForwarder] = None
+        try:
+            self._start_local_workers(local_workers)
+            self._connect_remote_workers(remote_workers)
+        except Exception:
+            self.close()
+            raise
+        if not self._connections:
+            raise ValueError(
+                "The distributed MUS computation needs at least one worker"
+            )
+
+    def __enter__(self) -> "DistributedCoreComputer":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+    def _start_local_workers(self, amount: int) -> None:
+        if amount == 0:
+            return
+        context = multiprocessing.get_context("spawn")
+        self._log_forwarder = ChildLogForwarder(context)
+        for _ in range(amount):
+            parent_connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=serve_child,
+                args=(child_connection, self._log_forwarder.initargs),
+                daemon=True,
+            )
+            process.start()
+            child_connection.close()
+            self._connections.append(parent_connection)
+            self._processes.append(process)
+        logger.debug("Started %d local MUS worker processes", amount)
+
+    def _connect_remote_workers(self, addresses: Sequence[str]) -> None:
+        for address in addresses:
+            sock = socket.create_connection(parse_address(address))
+            self._connections.append(SocketConnection(sock))
+            logger.debug("Connected to remote MUS worker %s", address)
+
+    def close(self) -> None:
+        for connection in self._connections:
+            try:
+                connection.send({"op": OP_CLOSE})
+                connection.close()
+            except (OSError, ValueError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        if self._log_forwarder is not None:
+            self._log_forwarder.close()
+            self._log_forwarder = None
+        self._connections = []
+        self._processes = []
+
+    @staticmethod
+    def _receive(connection: Connection) -> Message:
+        response = connection.recv()
+        if "error" in response:
+            raise RuntimeError(f"MUS worker failed: {response['error']}")
+        return response
+
+    def _check_wave(
+        self, working: List[int], partitions: Sequence[List[int]]
+    ) -> List[Message]:
+        for i, (connection, partition) in enumerate(zip(self._connections, partitions)):
+            excluded = set(partition)
+            indices = [index for index in working if index not in excluded]
+            connection.send({"op": OP_CHECK, "id": i, "indices": indices})
+        return [
+            self._receive(connection)
+            for connection, _ in zip(self._connections, partitions)
+        ]
+
+    def _verify(self, working: List[int]) -> None:
+        connection = self._connections[0]
+        connection.send({"op": OP_CHECK, "id": 0, "indices": working})
+        if self._receive(connection)["satisfiable"]:
+            raise RuntimeError(
+                "Distributed MUS computation produced a satisfiable subset"
+            )
+
+    def shrink(self, core: Sequence[Tuple[Symbol, bool]]) -> List[Tuple[Symbol, bool]]:
+        """Computes a minimal unsatisfiable subset of the unsatisfiable core `core`"""
+        assumptions = list(core)
+        init = {
+            "op": OP_INIT,
+            "program": self._program,
+            "assumptions": [[str(symbol), sign] for symbol, sign in assumptions],
+        }
+        for connection in self._connections:
+            connection.send(init)
+        for connection in self._connections:
+            self._receive(connection)
+
+        worker_count = len(self._connections)
+        working: List[int] = list(range(len(assumptions)))
+        necessary: Set[int] = set()
+        partition_size = max(1, math.ceil(len(working) / worker_count))
+        while True:
+            candidates = [index for index in working if index not in necessary]
+            if not candidates:
+                break
+            partition_size = min(
+                partition_size, max(1, math.ceil(len(candidates) / worker_count))
+            )
+            partitions = [
+                candidates[i : i + partition_size]
+                for i in range(0, len(candidates), partition_size)
+            ]
+            refined: Optional[List[int]] = None
+            for start in range(0, len(partitions), worker_count):
+                wave = partitions[start : start + worker_count]
+                results = self._check_wave(working, wave)
+                for partition, result in zip(wave, results):
+                    if result["satisfiable"]:
+                        # Satisfiability is kept for all subsets, so the assumption stays necessary
+                        if len(partition) == 1:
+                            necessary.add(partition[0])
+                    elif refined is None:
+                        refined_core = set(result["core"])
+                        refined = [index for index in working if index in refined_core]
+                if refined is not None:
+                    break
+            if refined is not None:
+                logger.debug(
+                    "Distributed MUS: reduced core from %d to %d",
+                    len(working),
+                    len(refined),
+                )
+                working = refined
+            elif partition_size > 1:
+                partition_size = math.ceil(partition_size / 2)
+
+        self._verify(working)
+        return [assumptions[index] for index in working]
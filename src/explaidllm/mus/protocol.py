@@ -0,0 +1,62 @@
+"""Wire protocol shared by the distributed MUS coordinator and its workers"""
+
+import json
+import socket
+import struct
+from typing import Any, Dict, Protocol, Tuple
+
+OP_INIT = "init"
+OP_CHECK = "check"
+OP_CLOSE = "close"
+
+HEADER = struct.Struct("!I")
+
+Message = Dict[str, Any]
+
+
+class Connection(Protocol):
+    """Bidirectional message channel between a coordinator and a worker"""
+
+    def send(self, message: Message) -> None:
+        """Sends a single message"""
+
+    def recv(self) -> Message:
+        """Receives a single message (blocking)"""
+
+    def close(self) -> None:
+        """Closes the channel"""
+
+
+class SocketConnection:
+    """Length-prefixed JSON messages over a stream socket"""
+
+    def __init__(self, sock: socket.socket):
+        self._socket = sock
+
+    def send(self, message: Message) -> None:
+        payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+        self._socket.sendall(HEADER.pack(len(payload)) + payload)
+
+    def recv(self) -> Message:
+        (length,) = HEADER.unpack(self._recv_exactly(HEADER.size))
+        return json.loads(self._recv_exactly(length).decode("utf-8"))
+
+    def _recv_exactly(self, size: int) -> bytes:
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self._socket.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("Connection closed by peer")
+            buffer.extend(chunk)
+        return bytes(buffer)
+
+    def close(self) -> None:
+        self._socket.close()
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    """Parses a worker address of the format <host>:<port>"""
+    host, separator, port = address.rpartition(":")
+    if not separator or not host or not port.isdigit():
+        raise ValueError(f"Wrong address format: {address}")
+    return host, int(port)
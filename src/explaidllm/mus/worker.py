@@ -0,0 +1,124 @@
+"""Worker side of the distributed MUS computation"""
+
+import argparse
+import logging
+import socket
+from typing import Dict, List, Optional, Sequence
+
+import clingo
+
+from ..utils.logging import (
+    DEFAULT_LOGGER_NAME,
+    clingo_logger,
+    forward_logging,
+    setup_logger,
+)
+from .protocol import (
+    OP_CHECK,
+    OP_CLOSE,
+    OP_INIT,
+    Connection,
+    Message,
+    SocketConnection,
+    parse_address,
+)
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+
+class MusWorker:
+    """Grounds the program once and answers satisfiability checks on subsets of the core"""
+
+    def __init__(self) -> None:
+        self._control: Optional[clingo.Control] = None
+        self._literals: List[int] = []
+        self._index_lookup: Dict[int, int] = {}
+
+    def initialize(self, program: str, assumptions: Sequence[Sequence]) -> None:
+        control = clingo.Control(logger=clingo_logger)
+        control.add("base", [], program)
+        control.ground([("base", [])])
+        symbol_lookup = {atom.symbol: atom.literal for atom in control.symbolic_atoms}
+        self._literals = []
+        for symbol_string, sign in assumptions:
+            literal = symbol_lookup[clingo.parse_term(symbol_string)]
+            self._literals.append(literal if sign else -literal)
+        self._index_lookup = {
+            literal: index for index, literal in enumerate(self._literals)
+        }
+        self._control = control
+
+    def check(self, indices: Sequence[int]) -> Message:
+        if self._control is None:
+            raise RuntimeError("Worker received a check before being initialized")
+        assumptions = [self._literals[i] for i in indices]
+        with self._control.solve(assumptions=assumptions, yield_=True) as solve_handle:
+            if solve_handle.get().satisfiable:
+                return {"satisfiable": True, "core": None}
+            core = [self._index_lookup[literal] for literal in solve_handle.core()]
+        return {"satisfiable": False, "core": core}
+
+    def handle(self, message: Message) -> Optional[Message]:
+        operation = message.get("op")
+        if operation == OP_INIT:
+            self.initialize(message["program"], message["assumptions"])
+            return {"ok": True}
+        if operation == OP_CHECK:
+            return {"id": message["id"], **self.check(message["indices"])}
+        if operation == OP_CLOSE:
+            return None
+        raise ValueError(f"Unknown operation: {operation}")
+
+
+def serve(connection: Connection) -> None:
+    """Answers coordinator requests on the connection until it is closed"""
+    worker = MusWorker()
+    try:
+        while True:
+            try:
+                message = connection.recv()
+            except (ConnectionError, EOFError):
+                break
+            try:
+                response = worker.handle(message)
+            except Exception as error:  # pylint: disable=broad-except
+                response = {"id": message.get("id"), "error": repr(error)}
+            if response is None:
+                break
+            connection.send(response)
+    finally:
+        connection.close()
+
+
+def serve_child(connection: Connection, log_initargs: Sequence) -> None:
+    """Entry point of local worker processes, their log records are handled by the coordinator's process"""
+    forward_logging(*log_initargs)
+    serve(connection)
+
+
+def serve_socket(host: str, port: int) -> None:
+    """Serves coordinators connecting to <host>:<port>, one connection at a time"""
+    with socket.create_server((host, port)) as server:
+        logger.info("MUS worker listening on %s:%d", host, port)
+        while True:
+            client, address = server.accept()
+            logger.debug("Coordinator connected from %s:%d", address[0], address[1])
+            serve(SocketConnection(client))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Remote worker for the distributed MUS computation of ExplaidLLM"
+    )
+    parser.add_argument(
+        "address",
+        help="Address to listen on (format: <host>:<port>). The protocol is not authenticated, so only listen on "
+        "127.0.0.1 or a private interface",
+    )
+    args = parser.parse_args()
+    setup_logger(level=logging.INFO)
+    serve_socket(*parse_address(args.address))
+
+
+if __name__ == "__main__":
+    main()
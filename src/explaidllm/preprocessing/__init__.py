@@ -0,0 +1,3 @@
+from .parallel import PreprocessingIndex, preprocess_files
+
+__all__ = ["PreprocessingIndex", "preprocess_files"]
@@ -0,0 +1,213 @@
+"""Parallel preprocessing of multi-file programs with an index of unchanged files"""
+
+import json
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import clingo
+from clingo import Symbol
+
+from ..utils.assumptions import AssumptionStore
+from ..utils.cache import CACHE_DIRECTORY, write_json
+from ..utils.logging import DEFAULT_LOGGER_NAME, ChildLogForwarder
+from ..utils.source import map_file
+from .worker import (
+    CONSTANT_RE,
+    INCLUDE_RE,
+    FileResult,
+    cache_key,
+    load_cached,
+    process_file,
+)
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+DEFAULT_INDEX_DIRECTORY = CACHE_DIRECTORY / "preprocessing"
+
+
+@dataclass
+class _SourceFile:
+    path: str
+    mtime_ns: int
+    size: int
+    digest: str = ""
+    includes: List[str] = field(default_factory=list)
+    constants: List[str] = field(default_factory=list)
+
+
+class PreprocessingIndex:
+    """
+    Index of previously preprocessed files stored in `directory`. A small JSON file maps every path to its mtime, size,
+    content digest, includes and constants. The preprocessed programs are stored separately, one file per digest and
+    configuration, so only the results that are needed are read and only changed files are written.
+    """
+
+    def __init__(self, directory: Optional[Path] = DEFAULT_INDEX_DIRECTORY):
+        self._directory = Path(directory) if directory is not None else None
+        self._entries: Dict[str, Dict] = {}
+        if self._directory is not None and self._path.exists():
+            try:
+                with open(self._path, "r", encoding="utf-8") as index_file:
+                    self._entries = json.load(index_file)
+            except (OSError, ValueError) as error:
+                logger.warning("Ignoring unreadable preprocessing index: %s", error)
+
+    @property
+    def _path(self) -> Path:
+        return self._directory / "index.json"
+
+    @property
+    def results_directory(self) -> Optional[str]:
+        """Directory of the cached results, None if the index is only kept in memory"""
+        return None if self._directory is None else str(self._directory / "results")
+
+    def get(self, path: str) -> Optional[Dict]:
+        return self._entries.get(path)
+
+    def put(self, path: str, entry: Dict) -> None:
+        self._entries[path] = entry
+
+    def save(self) -> None:
+        if self._directory is None:
+            return
+        try:
+            write_json(self._path, self._entries)
+        except OSError as error:
+            logger.warning("Could not write preprocessing index: %s", error)
+
+
+def _scan(path: str, index: PreprocessingIndex) -> _SourceFile:
+    """
+    Collects includes and constants of a file. Files with unchanged mtime and size are taken from the index, others
+    are searched through a memory map (their digest is computed by the worker).
+    """
+    stat = os.stat(path)
+    source = _SourceFile(path=path, mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+    entry = index.get(path)
+    if (
+        entry is not None
+        and entry["mtime_ns"] == source.mtime_ns
+        and entry["size"] == source.size
+    ):
+        source.digest = entry["digest"]
+        source.includes = entry["includes"]
+        source.constants = entry["constants"]
+        return source
+
+    directory = os.path.dirname(path)
+    with map_file(path) as content:
+        for match in INCLUDE_RE.finditer(content):
+            include = match.group(1).decode("utf-8")
+            candidate = os.path.join(directory, include)
+            source.includes.append(
+                os.path.realpath(candidate if os.path.exists(candidate) else include)
+            )
+        source.constants = [
+            match.group(0).decode("utf-8").strip()
+            for match in CONSTANT_RE.finditer(content)
+        ]
+    return source
+
+
+def preprocess_files(
+    files: Sequence[str],
+    assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+    processes: Optional[int] = None,
+    index: Optional[PreprocessingIndex] = None,
+) -> Tuple[str, AssumptionStore]:
+    """
+    Preprocesses every file (and every included file) separately in a process pool and merges the resulting programs
+    and assumptions. Files that did not change since they were last processed with the same assumption signatures
+    and constants are taken from the index.
+    """
+    if index is None:
+        index = PreprocessingIndex(directory=None)
+    signatures = sorted(assumption_signatures or ())
+
+    # Collect all files including the transitively included ones
+    sources: List[_SourceFile] = []
+    seen: Set[str] = set()
+    pending = [os.path.realpath(f) for f in files]
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.add(path)
+        source = _scan(path, index)
+        sources.append(source)
+        pending.extend(source.includes)
+
+    results: Dict[str, FileResult] = {}
+    jobs: Dict[str, str] = {}
+    for source in sources:
+        # Constants of the other files are needed to unpool ranges
+        constants_program = "\n".join(
+            c for other in sources if other is not source for c in other.constants
+        )
+        cached = None
+        if source.digest:
+            cached = load_cached(
+                index.results_directory,
+                cache_key(source.digest, signatures, constants_program),
+            )
+        if cached is not None:
+            results[source.path] = cached
+        else:
+            jobs[source.path] = constants_program
+    logger.debug(
+        "Preprocessing %d files (%d unchanged)", len(sources), len(sources) - len(jobs)
+    )
+
+    if jobs:
+        context = multiprocessing.get_context("spawn")
+        with (
+            ChildLogForwarder(context) as log_forwarder,
+            ProcessPoolExecutor(
+                max_workers=min(processes or os.cpu_count() or 1, len(jobs)),
+                mp_context=context,
+                initializer=log_forwarder.initializer,
+                initargs=log_forwarder.initargs,
+            ) as executor,
+        ):
+            futures = {
+                path: executor.submit(
+                    process_file,
+                    path,
+                    signatures,
+                    constants_program,
+                    index.results_directory,
+                )
+                for path, constants_program in jobs.items()
+            }
+            for path, future in futures.items():
+                results[path] = future.result()
+
+    program_parts = []
+    # Merged in file order without duplicates
+    assumptions: Dict[Tuple[Symbol, bool], None] = {}
+    for source in sources:
+        result = results[source.path]
+        program_parts.append(result.program)
+        assumptions.update(
+            ((clingo.parse_term(symbol), sign), None)
+            for symbol, sign in result.assumptions
+        )
+        if source.path in jobs:
+            index.put(
+                source.path,
+                {
+                    "mtime_ns": source.mtime_ns,
+                    "size": source.size,
+                    "digest": result.digest,
+                    "includes": source.includes,
+                    "constants": source.constants,
+                },
+            )
+    if jobs:
+        index.save()
+    return "\n".join(program_parts), AssumptionStore.from_assumptions(assumptions)
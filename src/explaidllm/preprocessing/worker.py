@@ -0,0 +1,110 @@
+"""Per-file preprocessing executed in the worker processes"""
+
+import hashlib
+import json
+import mmap
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Union
+
+import clingo
+from clingexplaid.preprocessors import AssumptionPreprocessor, FilterSignature
+
+from ..utils.cache import write_json
+from ..utils.logging import clingo_logger
+from ..utils.source import map_file
+
+INCLUDE_RE = re.compile(rb'^[ \t]*#include[ \t]+"([^"]+)"[ \t]*\.', re.MULTILINE)
+CONSTANT_RE = re.compile(rb"^[ \t]*#const[ \t]+[^.\n]+\.", re.MULTILINE)
+
+
+@dataclass
+class FileResult:
+    """
+    Preprocessed program and assumptions of a single file together with the digest of its content. Assumptions are
+    passed as strings since symbols are only valid in the process that created them.
+    """
+
+    program: str
+    assumptions: List[Tuple[str, bool]]
+    digest: str = ""
+
+
+def strip_includes(content: Union[mmap.mmap, bytes]) -> bytes:
+    """Blanks out `#include "<file>".` directives, keeping the line numbers intact"""
+    return INCLUDE_RE.sub(lambda m: b" " * len(m.group(0)), content)
+
+
+def cache_key(
+    digest: str,
+    assumption_signatures: Sequence[Tuple[str, int]],
+    constants_program: str,
+) -> str:
+    """Key of a preprocessing result, it depends on the file content, the signatures and the other files' constants"""
+    configuration = json.dumps([digest, list(assumption_signatures), constants_program])
+    return hashlib.sha256(configuration.encode("utf-8")).hexdigest()
+
+
+def load_cached(cache_directory: Optional[str], key: str) -> Optional[FileResult]:
+    if cache_directory is None:
+        return None
+    try:
+        with open(Path(cache_directory) / f"{key}.json", "r", encoding="utf-8") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return FileResult(
+        program=cached["program"],
+        assumptions=[(symbol, sign) for symbol, sign in cached["assumptions"]],
+    )
+
+
+def save_cached(cache_directory: Optional[str], key: str, result: FileResult) -> None:
+    if cache_directory is None:
+        return
+    try:
+        write_json(
+            Path(cache_directory) / f"{key}.json",
+            {"program": result.program, "assumptions": result.assumptions},
+        )
+    except OSError:
+        # The cache is only an optimization, the result is still returned
+        pass
+
+
+def process_file(
+    path: str,
+    assumption_signatures: Sequence[Tuple[str, int]],
+    constants_program: str,
+    cache_directory: Optional[str] = None,
+) -> FileResult:
+    """
+    Converts the facts of a single file to assumptions. Included files are handled as separate files, the constants
+    of all files are registered first so ranges using them can be unpooled. Results are cached in `cache_directory`
+    by the digest of the file content, so files that were only touched are not processed again.
+    """
+    with map_file(path) as content:
+        digest = hashlib.sha256(content).hexdigest()
+        key = cache_key(digest, assumption_signatures, constants_program)
+        cached = load_cached(cache_directory, key)
+        if cached is not None:
+            cached.digest = digest
+            return cached
+        text = strip_includes(content).decode("utf-8")
+
+    filters: Optional[List[FilterSignature]] = [
+        FilterSignature(name=name, arity=arity) for name, arity in assumption_signatures
+    ] or None
+    ap = AssumptionPreprocessor(
+        filters=filters, control=clingo.Control(logger=clingo_logger)
+    )
+    prefix = ap.process(constants_program)
+    program = ap.process(text)
+    result = FileResult(
+        program=program[len(prefix) :].lstrip("\n"),
+        assumptions=[(str(symbol), sign) for symbol, sign in sorted(ap.assumptions)],
+        digest=digest,
+    )
+    save_cached(cache_directory, key, result)
+    return result
@@ -0,0 +1,25 @@
+from .limited import (
+    compute_mus_limited,
+    compute_ucs_limited,
+    is_satisfiable_limited,
+    preprocess_limited,
+)
+from .solver import (
+    compute_mus,
+    compute_ucs,
+    is_satisfiable,
+    preprocess,
+    render_assumptions,
+)
+
+__all__ = [
+    "compute_mus",
+    "compute_mus_limited",
+    "compute_ucs",
+    "compute_ucs_limited",
+    "is_satisfiable",
+    "is_satisfiable_limited",
+    "preprocess",
+    "preprocess_limited",
+    "render_assumptions",
+]
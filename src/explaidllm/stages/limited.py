@@ -0,0 +1,239 @@
+"""
+Solver stages run in child processes within resource limits. Symbols can't be passed between processes, so the
+portable variants of the stages exchange strings, indices and plain tuples instead.
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import clingo
+from clingexplaid.mus.core_computer import UnsatisfiableSubset
+from clingexplaid.mus.utils import AssumptionWrapper
+from clingo.ast import Location, Position
+
+from ..utils.assumptions import AssumptionStore
+from ..utils.limits import REASON_TIME, LimitExceeded, ResourceLimits, run_limited
+from ..utils.logging import DEFAULT_LOGGER_NAME
+from .solver import (
+    compute_mus,
+    compute_unsat_constraints,
+    is_satisfiable,
+    mus_string,
+    preprocess,
+)
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+# (symbol, sign) of an assumption
+PortableAssumption = Tuple[str, bool]
+# (begin filename, begin line, begin column, end filename, end line, end column)
+PortableLocation = Tuple[str, int, int, str, int, int]
+
+
+def is_satisfiable_limited(files: Sequence[str], limits: ResourceLimits) -> bool:
+    """
+    Runs `is_satisfiable` in a child process within the limits. If a limit is hit the program is assumed to be
+    unsatisfiable, so the MUS computation can still try its fallbacks.
+    """
+    try:
+        satisfiable, report = run_limited(
+            "Satisfiability check", limits, is_satisfiable, list(files)
+        )
+    except LimitExceeded as error:
+        logger.warning("%s, assuming the program is unsatisfiable", error.report)
+        return False
+    logger.info("%s", report)
+    return satisfiable
+
+
+def preprocess_portable(
+    files: Sequence[str],
+    assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+) -> Tuple[str, List[PortableAssumption]]:
+    """Variant of `preprocess` returning the assumptions as strings"""
+    program, assumptions = preprocess(files, assumption_signatures)
+    return program, [
+        (assumptions.string(literal), literal >= 0) for literal in assumptions
+    ]
+
+
+def preprocess_limited(
+    files: Sequence[str],
+    assumption_signatures: Optional[Set[Tuple[str, int]]],
+    limits: ResourceLimits,
+    stage: str = "Preprocessing",
+) -> Tuple[str, AssumptionStore]:
+    """Runs `preprocess` in a child process within the limits, raises `LimitExceeded` if a limit is hit"""
+    (program, assumptions), report = run_limited(
+        stage, limits, preprocess_portable, list(files), assumption_signatures
+    )
+    logger.info("%s", report)
+    return program, AssumptionStore.from_assumptions(
+        (clingo.parse_term(symbol), sign) for symbol, sign in assumptions
+    )
+
+
+def compute_mus_portable(
+    program: str,
+    assumptions: Sequence[PortableAssumption],
+    mus_workers: int = 0,
+    mus_worker_addresses: Sequence[str] = (),
+    shrink: bool = True,
+) -> Optional[Tuple[List[int], bool]]:
+    """
+    Variant of `compute_mus` returning the positions of the MUS assumptions and whether the MUS is minimal, None if
+    the program is satisfiable.
+    """
+    mus, store = compute_mus(
+        program,
+        AssumptionStore.from_assumptions(
+            (clingo.parse_term(s), sign) for s, sign in assumptions
+        ),
+        mus_workers=mus_workers,
+        mus_worker_addresses=mus_worker_addresses,
+        shrink=shrink,
+    )
+    if mus is None:
+        return None
+    return [store.position(a.literal) for a in mus.assumptions], mus.minimal
+
+
+def compute_mus_limited(
+    program: str,
+    assumptions: AssumptionStore,
+    limits: ResourceLimits,
+    files: Sequence[str] = (),
+    fallback_assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+    mus_workers: int = 0,
+    mus_worker_addresses: Sequence[str] = (),
+) -> Tuple[Optional[UnsatisfiableSubset], AssumptionStore]:
+    """
+    Runs `compute_mus` in a child process within the limits. If a limit is hit, smaller configurations are tried:
+    the unshrunk core (only if the time limit was hit, as grounding is the same) and the stricter fallback
+    assumption signatures. The files are preprocessed with the fallback signatures in a limited child process too.
+    Raises `LimitExceeded` if all configurations hit a limit.
+    """
+    configurations: List[Tuple[str, Optional[Set[Tuple[str, int]]], bool]] = [
+        ("MUS", None, True),
+        ("Unshrunk core", None, False),
+    ]
+    if fallback_assumption_signatures and files:
+        configurations += [
+            ("MUS with fallback signatures", fallback_assumption_signatures, True),
+            (
+                "Unshrunk core with fallback signatures",
+                fallback_assumption_signatures,
+                False,
+            ),
+        ]
+
+    error: Optional[LimitExceeded] = None
+    fallback: Optional[Tuple[str, AssumptionStore]] = None
+    for stage, signatures, shrink in configurations:
+        if error is not None and error.reason != REASON_TIME and not shrink:
+            # The unshrunk core only saves time, its program is grounded the same way
+            continue
+        stage_program, stage_assumptions = program, assumptions
+        if signatures is not None:
+            if fallback is None:
+                try:
+                    fallback = preprocess_limited(
+                        files,
+                        signatures,
+                        limits,
+                        stage="Preprocessing with fallback signatures",
+                    )
+                except LimitExceeded as exceeded:
+                    logger.warning("%s", exceeded.report)
+                    error = exceeded
+                    break
+            stage_program, stage_assumptions = fallback
+            if len(stage_assumptions) == 0:
+                logger.warning("No assumptions match the fallback signatures")
+                break
+        try:
+            result, report = run_limited(
+                stage,
+                limits,
+                compute_mus_portable,
+                stage_program,
+                [
+                    (stage_assumptions.string(literal), literal >= 0)
+                    for literal in stage_assumptions
+                ],
+                mus_workers=mus_workers,
+                mus_worker_addresses=mus_worker_addresses,
+                shrink=shrink,
+            )
+        except LimitExceeded as exceeded:
+            logger.warning("%s", exceeded.report)
+            error = exceeded
+            continue
+        logger.info("%s", report)
+
+        if result is None:
+            return None, stage_assumptions
+        # The positions of the child's MUS map to the unbound literals of the store
+        mus_positions, minimal = result
+        literals = stage_assumptions.literals
+        mus = UnsatisfiableSubset(
+            {
+                AssumptionWrapper(
+                    literal=literals[i],
+                    symbol=stage_assumptions.symbol(literals[i]),
+                    sign=literals[i] >= 0,
+                )
+                for i in mus_positions
+            },
+            minimal=minimal,
+        )
+        return mus, stage_assumptions
+    raise error
+
+
+def compute_ucs_portable(
+    files: Sequence[str], assumption_string: str
+) -> Tuple[Dict[int, str], Dict[int, Optional[PortableLocation]]]:
+    """Variant of `compute_unsat_constraints` returning the locations as plain tuples"""
+    unsatisfiable_constraints, locations = compute_unsat_constraints(
+        files, assumption_string
+    )
+    return unsatisfiable_constraints, {
+        c_id: None
+        if location is None
+        else (
+            location.begin.filename,
+            location.begin.line,
+            location.begin.column,
+            location.end.filename,
+            location.end.line,
+            location.end.column,
+        )
+        for c_id, location in locations.items()
+    }
+
+
+def compute_ucs_limited(
+    files: Sequence[str],
+    mus: UnsatisfiableSubset,
+    assumptions: AssumptionStore,
+    limits: ResourceLimits,
+) -> Tuple[Dict[int, str], Dict[int, Optional[Location]]]:
+    """
+    Runs `compute_ucs` in a child process within the limits, as it grounds the whole transformed program. Raises
+    `LimitExceeded` if a limit is hit.
+    """
+    (unsatisfiable_constraints, locations), report = run_limited(
+        "Unsatisfiable constraints",
+        limits,
+        compute_ucs_portable,
+        list(files),
+        mus_string(mus, assumptions),
+    )
+    logger.info("%s", report)
+    return unsatisfiable_constraints, {
+        c_id: None
+        if location is None
+        else Location(begin=Position(*location[:3]), end=Position(*location[3:]))
+        for c_id, location in locations.items()
+    }
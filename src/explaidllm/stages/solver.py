@@ -0,0 +1,184 @@
+"""Solver stages of the explanation pipeline: preprocessing, satisfiability check, MUS and unsatisfiable constraints"""
+
+import logging
+from typing import Dict, Iterable, Optional, Sequence, Set, Tuple
+
+import clingo
+from clingexplaid.mus import CoreComputer
+from clingexplaid.mus.core_computer import UnsatisfiableSubset
+from clingexplaid.mus.utils import AssumptionWrapper
+from clingexplaid.preprocessors import AssumptionPreprocessor, FilterSignature
+from clingexplaid.unsat_constraints import UnsatConstraintComputer
+from clingo.ast import Location
+
+from ..mus import DistributedCoreComputer
+from ..preprocessing import PreprocessingIndex, preprocess_files
+from ..utils.assumptions import AssumptionStore
+from ..utils.logging import DEFAULT_LOGGER_NAME, Lazy, clingo_logger
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+
+def render_assumptions(assumptions: AssumptionStore) -> str:
+    return assumptions.render()
+
+
+def is_satisfiable(files: Iterable[str]) -> bool:
+    control = clingo.Control(logger=clingo_logger)
+    for file in files:
+        logger.debug("Loading file: %s", file)
+        control.load(file)
+    control.ground([("base", [])])
+    return control.solve().satisfiable
+
+
+def preprocess(
+    files: Sequence[str],
+    assumption_signatures: Optional[Set[Tuple[str, int]]] = None,
+    preprocess_workers: int = 0,
+) -> Tuple[str, AssumptionStore]:
+    if files and preprocess_workers > 0:
+        logger.debug("Preprocessing %s with %d processes", files, preprocess_workers)
+        program, assumptions = preprocess_files(
+            files,
+            assumption_signatures,
+            processes=preprocess_workers,
+            index=PreprocessingIndex(),
+        )
+        logger.debug("Processed Files:\n%s", program)
+        return program, assumptions
+    assumption_filters = [
+        FilterSignature(name=name, arity=arity)
+        for (name, arity) in assumption_signatures or ()
+    ]
+    assumption_filters = None if len(assumption_filters) == 0 else assumption_filters
+    ap = AssumptionPreprocessor(
+        filters=assumption_filters, control=clingo.Control(logger=clingo_logger)
+    )
+    result = None
+    if not files:
+        pass
+        logger.debug("Reading from -")
+        logger.warning("IMPLEMENT READING FROM STDIN HERE")
+    else:
+        logger.debug("Reading from %s %s", files[0], "..." if len(files) > 1 else "")
+        result = ap.process_files(list(files))
+        logger.debug("Processed Files:\n%s", result)
+    return result, AssumptionStore.from_assumptions(ap.assumptions)
+
+
+def compute_mus(
+    program: str,
+    assumptions: AssumptionStore,
+    mus_workers: int = 0,
+    mus_worker_addresses: Sequence[str] = (),
+    shrink: bool = True,
+) -> Tuple[Optional[UnsatisfiableSubset], AssumptionStore]:
+    """Computes a MUS of the program, with `shrink` disabled the first unsatisfiable core is returned instead"""
+    control = clingo.Control(logger=clingo_logger)
+    control.configuration.solve.models = 0
+    control.add("base", [], program)
+    control.ground([("base", [])])
+    cc = CoreComputer(control=control, assumption_set=[])
+    assumptions = assumptions.bind(cc.symbol_lookup)
+    logger.debug(
+        "Solving program with assumptions: %s",
+        Lazy(render_assumptions, assumptions),
+    )
+    with control.solve(
+        assumptions=assumptions.literals.tolist(), yield_=True
+    ) as solve_handle:
+        result = solve_handle.get()
+        if result.satisfiable:
+            return None, assumptions
+        elif len(solve_handle.core()) == 0:
+            logger.debug(
+                "No unsatisfiable core found, probably because of too restrictive assumption filters"
+            )
+            return UnsatisfiableSubset(set(), minimal=False), assumptions
+        else:
+            if not shrink:
+                logger.debug("Using unshrunk core of UNSAT Program")
+                return (
+                    UnsatisfiableSubset(
+                        {
+                            AssumptionWrapper(
+                                literal=literal,
+                                symbol=assumptions.symbol(literal),
+                                sign=literal >= 0,
+                            )
+                            for literal in solve_handle.core()
+                        },
+                        minimal=False,
+                    ),
+                    assumptions,
+                )
+            logger.debug("Computing MUS of UNSAT Program")
+            if mus_workers > 0 or mus_worker_addresses:
+                mus = shrink_distributed(
+                    cc,
+                    program=program,
+                    core=solve_handle.core(),
+                    mus_workers=mus_workers,
+                    mus_worker_addresses=mus_worker_addresses,
+                )
+            else:
+                mus = cc.shrink(solve_handle.core())
+            return mus, assumptions
+
+
+def shrink_distributed(
+    cc: CoreComputer,
+    program: str,
+    core: Sequence[int],
+    mus_workers: int = 0,
+    mus_worker_addresses: Sequence[str] = (),
+) -> UnsatisfiableSubset:
+    core_symbols = [(cc.literal_lookup[abs(literal)], literal >= 0) for literal in core]
+    with DistributedCoreComputer(
+        program=program,
+        local_workers=mus_workers,
+        remote_workers=mus_worker_addresses,
+    ) as dcc:
+        mus_symbols = dcc.shrink(core_symbols)
+    assumptions = set()
+    for symbol, sign in mus_symbols:
+        literal = cc.symbol_lookup[symbol]
+        assumptions.add(
+            AssumptionWrapper(
+                literal=literal if sign else -literal, symbol=symbol, sign=sign
+            )
+        )
+    return UnsatisfiableSubset(assumptions, minimal=True)
+
+
+def mus_string(mus: UnsatisfiableSubset, assumptions: AssumptionStore) -> str:
+    """Renders the MUS assumptions as space separated (possibly negated) atoms"""
+    return " ".join(
+        [
+            f"{'' if a.sign else '-'}{assumptions.string(a.literal)}"
+            for a in mus.assumptions
+        ]
+    )
+
+
+def compute_unsat_constraints(
+    files: Sequence[str], assumption_string: str
+) -> Tuple[Dict[int, str], Dict[int, Location]]:
+    """Computes the constraints violated by the program with the atoms of `assumption_string` as the only facts"""
+    ucc = UnsatConstraintComputer(control=clingo.Control(logger=clingo_logger))
+    ucc.parse_files(files)
+    unsatisfiable_constraints = ucc.get_unsat_constraints(
+        assumption_string=assumption_string
+    )
+    locations = {
+        c_id: ucc.get_constraint_location(c_id)
+        for c_id in unsatisfiable_constraints.keys()
+    }
+    return unsatisfiable_constraints, locations
+
+
+def compute_ucs(
+    files: Sequence[str], mus: UnsatisfiableSubset, assumptions: AssumptionStore
+) -> Tuple[Dict[int, str], Dict[int, Location]]:
+    return compute_unsat_constraints(files, mus_string(mus, assumptions))
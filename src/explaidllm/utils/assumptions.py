@@ -0,0 +1,138 @@
+"""Compact representation of assumption sets"""
+
+from array import array
+from bisect import bisect_left
+from typing import Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from clingo import Symbol
+
+
+class AssumptionStore:
+    """
+    Array-backed assumption set holding the signed literals of the assumptions next to their symbols. Until the store
+    is bound to a grounded control its literals are the 1-based positions of the assumptions, so a position is found
+    without any index. Bound stores find positions by bisecting a sorted copy of their literals. The string
+    representations of the symbols are only built when needed and memoized, so repeated renderings don't stringify a
+    symbol twice.
+    """
+
+    def __init__(
+        self, literals: Iterable[int], symbols: Iterable[Symbol], bound: bool = False
+    ):
+        self._literals = (
+            literals if isinstance(literals, array) else array("q", literals)
+        )
+        self._symbols: List[Symbol] = (
+            symbols if isinstance(symbols, list) else list(symbols)
+        )
+        if len(self._literals) != len(self._symbols):
+            raise ValueError("Every assumption literal needs exactly one symbol")
+        # Bound stores only: absolute literals in ascending order and the positions they belong to
+        self._sorted_literals: Optional[array] = None
+        self._sorted_positions: Optional[array] = None
+        if bound:
+            literals = self._literals
+            self._sorted_positions = array(
+                "q", sorted(range(len(literals)), key=lambda i: abs(literals[i]))
+            )
+            self._sorted_literals = array(
+                "q", (abs(literals[i]) for i in self._sorted_positions)
+            )
+        self._strings: Optional[List[Optional[str]]] = None
+
+    @classmethod
+    def from_assumptions(
+        cls, assumptions: Iterable[Tuple[Symbol, bool]]
+    ) -> "AssumptionStore":
+        """Builds an unbound store from (Symbol, bool) assumptions, keeping their order"""
+        literals = array("q")
+        symbols = []
+        for i, (symbol, sign) in enumerate(assumptions):
+            literals.append(i + 1 if sign else -(i + 1))
+            symbols.append(symbol)
+        return cls(literals, symbols)
+
+    def bind(self, symbol_lookup: Mapping[Symbol, int]) -> "AssumptionStore":
+        """
+        Returns a store with the solver literals of the assumptions using the symbol lookup of a grounded control. The
+        symbols are shared with this store and the lookup isn't referenced by the new store, so it can be freed with
+        the control.
+        """
+        store = AssumptionStore(
+            array(
+                "q",
+                (
+                    symbol_lookup[symbol] if literal >= 0 else -symbol_lookup[symbol]
+                    for literal, symbol in zip(self._literals, self._symbols)
+                ),
+            ),
+            self._symbols,
+            bound=True,
+        )
+        store._strings = self._strings
+        return store
+
+    def __len__(self) -> int:
+        return len(self._literals)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._literals)
+
+    @property
+    def literals(self) -> array:
+        """The signed literals of the assumptions"""
+        return self._literals
+
+    @staticmethod
+    def sign(literal: int) -> bool:
+        """Returns the sign of an assumption literal"""
+        return literal >= 0
+
+    def position(self, literal: int) -> int:
+        """Returns the position of an assumption literal in the store, raises a KeyError for unknown literals"""
+        key = abs(literal)
+        if self._sorted_literals is None:
+            if not 0 < key <= len(self._literals):
+                raise KeyError(literal)
+            return key - 1
+        i = bisect_left(self._sorted_literals, key)
+        if i == len(self._sorted_literals) or self._sorted_literals[i] != key:
+            raise KeyError(literal)
+        return self._sorted_positions[i]
+
+    def symbol(self, literal: int) -> Symbol:
+        """Returns the symbol of an assumption literal"""
+        return self._symbols[self.position(literal)]
+
+    def string(self, literal: int) -> str:
+        """Returns the memoized string representation of the symbol of an assumption literal"""
+        position = self.position(literal)
+        if self._strings is None:
+            self._strings = [None] * len(self._symbols)
+        string = self._strings[position]
+        if string is None:
+            string = str(self._symbols[position])
+            self._strings[position] = string
+        return string
+
+    def iter_symbols(
+        self, literals: Optional[Iterable[int]] = None
+    ) -> Iterator[Tuple[Symbol, bool]]:
+        """Iterates over `literals` (default: all assumptions) in their (Symbol, bool) representation"""
+        if literals is None:
+            literals = self._literals
+        return ((self.symbol(literal), literal >= 0) for literal in literals)
+
+    def iter_strings(self, literals: Optional[Iterable[int]] = None) -> Iterator[str]:
+        """Iterates over the symbol strings of `literals` (default: all assumptions)"""
+        if literals is None:
+            literals = self._literals
+        return (self.string(literal) for literal in literals)
+
+    def render(self) -> str:
+        """Renders the assumptions in the format {<symbol>[+], <symbol>[-], ...}"""
+        output = [
+            f"{self.string(literal)}{'[+]' if literal >= 0 else '[-]'}"
+            for literal in self._literals
+        ]
+        return "{" + ", ".join(output) + "}"
@@ -0,0 +1,31 @@
+"""Location of the cache directory and atomic writes of the files stored in it"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Union
+
+CACHE_DIRECTORY = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "explaidllm"
+)
+
+
+def write_json(path: Union[str, Path], data: Any) -> None:
+    """
+    Writes `data` as JSON to `path` (creating its directory) through a temporary file that replaces `path` once it is
+    complete, so concurrent readers never see a partially written file. Raises an OSError if the file can't be written.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # The temporary file is per process, so concurrent writers don't write into the same file
+    temporary_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        with open(temporary_path, "w", encoding="utf-8") as json_file:
+            json.dump(data, json_file)
+        os.replace(temporary_path, path)
+    except OSError:
+        try:
+            os.remove(temporary_path)
+        except OSError:
+            pass
+        raise
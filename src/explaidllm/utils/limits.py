@@ -0,0 +1,195 @@
+"""Running functions in a child process with memory and time limits"""
+
+import logging
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from .logging import DEFAULT_LOGGER_NAME, forward_logging
+
+logger = logging.getLogger(DEFAULT_LOGGER_NAME)
+
+T = TypeVar("T")
+
+POLL_INTERVAL = 0.05
+REASON_MEMORY = "memory"
+REASON_TIME = "time"
+REASON_TERMINATED = "terminated"
+
+MESSAGE_LOG = "log"
+MESSAGE_RESULT = "result"
+
+
+@dataclass
+class ResourceLimits:
+    """Limits of a child process, the memory limit is in bytes (resident set size) and the time limit in seconds"""
+
+    memory: Optional[int] = None
+    time: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory is not None or self.time is not None
+
+
+@dataclass
+class StageReport:
+    """Resource usage of a stage run in a child process"""
+
+    stage: str
+    peak_memory: int
+    duration: float
+    limit_hit: Optional[str] = None
+
+    def __str__(self) -> str:
+        outcome = "" if self.limit_hit is None else f", {self.limit_hit} limit hit"
+        return f"{self.stage}: peak memory {self.peak_memory / 2**20:.1f} MiB, {self.duration:.2f}s{outcome}"
+
+
+class LimitExceeded(Exception):
+    """Raised if a child process exceeded its limits or was terminated (e.g. by the OOM killer)"""
+
+    def __init__(self, report: StageReport):
+        super().__init__(str(report))
+        self.report = report
+
+    @property
+    def reason(self) -> str:
+        return self.report.limit_hit
+
+
+def _memory_usage(pid: int) -> Tuple[int, int]:
+    """Returns the current and peak resident set size of a process in bytes (0 if /proc is not available)"""
+    rss, peak = 0, 0
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss = int(line.split()[1]) * 1024
+                elif line.startswith("VmHWM:"):
+                    peak = int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return rss, max(rss, peak)
+
+
+def _own_peak_memory() -> int:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _LogSender:
+    """Queue interface for a QueueHandler sending the child's log records to the parent through the connection"""
+
+    def __init__(self, connection: Connection):
+        self._connection = connection
+
+    def put_nowait(self, record: logging.LogRecord) -> None:
+        self._connection.send((MESSAGE_LOG, record))
+
+
+def _child(
+    connection: Connection,
+    function: Callable[..., Any],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    memory_limit: Optional[int],
+    log_level: int,
+) -> None:
+    forward_logging(_LogSender(connection), DEFAULT_LOGGER_NAME, log_level)
+    if memory_limit is not None and not os.path.exists("/proc/self/status"):
+        # The parent can't observe the resident set size, limit the address space instead
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    try:
+        result = (True, function(*args, **kwargs), _own_peak_memory())
+    except MemoryError:
+        result = (False, REASON_MEMORY, _own_peak_memory())
+    except Exception as error:
+        result = (False, f"{type(error).__name__}: {error}", _own_peak_memory())
+    try:
+        connection.send((MESSAGE_RESULT, result))
+    finally:
+        connection.close()
+
+
+def run_limited(
+    stage: str,
+    limits: ResourceLimits,
+    function: Callable[..., T],
+    *args: Any,
+    **kwargs: Any,
+) -> Tuple[T, StageReport]:
+    """
+    Runs `function` in a spawned child process, killing it as soon as its resident set size or run time exceeds the
+    limits. Arguments and result are passed by pickling. Records the child logs are handled by the logger of this
+    process. Raises `LimitExceeded` if a limit was hit or the child died, and a RuntimeError if the function raised an
+    exception.
+    """
+    context = multiprocessing.get_context("spawn")
+    parent_connection, child_connection = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_child,
+        args=(
+            child_connection,
+            function,
+            args,
+            kwargs,
+            limits.memory,
+            logger.getEffectiveLevel(),
+        ),
+        name=f"explaidllm-{stage}",
+    )
+    start = time.monotonic()
+    process.start()
+    child_connection.close()
+
+    peak_memory = 0
+    message = None
+    limit_hit = None
+    try:
+        while message is None and limit_hit is None:
+            if parent_connection.poll(POLL_INTERVAL):
+                try:
+                    kind, payload = parent_connection.recv()
+                except EOFError:
+                    limit_hit = REASON_TERMINATED
+                    continue
+                if kind == MESSAGE_RESULT:
+                    message = payload
+                    continue
+                logger.handle(payload)
+            rss, peak = _memory_usage(process.pid)
+            peak_memory = max(peak_memory, peak)
+            if limits.memory is not None and rss > limits.memory:
+                limit_hit = REASON_MEMORY
+            elif limits.time is not None and time.monotonic() - start > limits.time:
+                limit_hit = REASON_TIME
+            elif not process.is_alive() and not parent_connection.poll():
+                limit_hit = REASON_TERMINATED
+    finally:
+        if process.is_alive() and message is None:
+            process.kill()
+        process.join()
+        parent_connection.close()
+
+    report = StageReport(
+        stage=stage, peak_memory=peak_memory, duration=time.monotonic() - start
+    )
+    if message is not None:
+        success, value, child_peak_memory = message
+        report.peak_memory = max(report.peak_memory, child_peak_memory)
+        if success:
+            return value, report
+        if value != REASON_MEMORY:
+            raise RuntimeError(f"{stage} failed: {value}")
+        limit_hit = REASON_MEMORY
+    if limit_hit == REASON_TERMINATED:
+        logger.debug("%s process died with exit code %s", stage, process.exitcode)
+    report.limit_hit = limit_hit
+    raise LimitExceeded(report)
@@ -1,5 +1,14 @@
+import atexit
+import copy
+import json
 import logging
-from typing import Optional
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from multiprocessing.context import BaseContext
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import clingo
 
 # Define ANSI escape sequences for colors
 LOG_COLORS = {
@@ -11,32 +20,166 @@ LOG_COLORS = {
     "RESET": "\033[0m",  # Reset
 }
 DEFAULT_LOGGER_NAME = "default_colored_logger"
+HANDLER_NAME = "explaidllm"
+
+# Record attributes that are not passed on as extra fields of JSON log lines
+_RESERVED_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+}
+
+_listeners: Dict[str, QueueListener] = {}
 
 
 class ColoredFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord):
         log_color = LOG_COLORS.get(record.levelname, LOG_COLORS["RESET"])
         reset = LOG_COLORS["RESET"]
+        # Color a copy so other handlers of the same record see the plain level name
+        record = copy.copy(record)
         record.levelname = f"{log_color}{record.levelname}{reset}"
         return super().format(record)
 
 
+class JsonFormatter(logging.Formatter):
+    """Formats records as single line JSON objects for log shipping"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class Lazy:
+    """Defers an expensive log argument until a handler actually formats the message"""
+
+    def __init__(self, function: Callable[..., Any], *args: Any, **kwargs: Any):
+        self._function = function
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self) -> str:
+        return str(self._function(*self._args, **self._kwargs))
+
+
+def clingo_logger(code: clingo.MessageCode, message: str) -> None:
+    """Routes clingo's messages to the default logger instead of writing them to stderr"""
+    logging.getLogger(DEFAULT_LOGGER_NAME).warning(
+        "%s", message.rstrip(), extra={"clingo_code": code.name}
+    )
+
+
+def forward_logging(log_queue: Any, name: str, level: int) -> None:
+    """Sends the records of the logger `name` of a child process to the parent, used as process initializer"""
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    handler = QueueHandler(log_queue)
+    handler.set_name(HANDLER_NAME)
+    logger.addHandler(handler)
+    logger.propagate = False
+
+
+class ChildLogForwarder:
+    """
+    Receives the records of spawned child processes initialized with `initializer` and `initargs` and lets the logger
+    `name` of this process handle them, so they reach its handlers (e.g. JSON lines) instead of the children's stderr.
+    Use as a context manager.
+    """
+
+    initializer = staticmethod(forward_logging)
+
+    def __init__(self, context: BaseContext, name: str = DEFAULT_LOGGER_NAME):
+        logger = logging.getLogger(name)
+        self._queue = context.Queue()
+        # The logger itself handles the forwarded records, like records logged in this process
+        self._listener = QueueListener(self._queue, logger)
+        self._listener.start()
+        self.initargs: Tuple[Any, ...] = (self._queue, name, logger.getEffectiveLevel())
+
+    def close(self) -> None:
+        if self._listener is not None:
+            self._listener.stop()
+            self._listener = None
+            self._queue.close()
+
+    def __enter__(self) -> "ChildLogForwarder":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _stop_listener(name: str) -> None:
+    listener = _listeners.pop(name, None)
+    if listener is not None:
+        listener.stop()
+
+
+def stop_logging() -> None:
+    """Flushes and stops all queue listeners started by `setup_logger`"""
+    for name in list(_listeners):
+        _stop_listener(name)
+
+
+atexit.register(stop_logging)
+
+
 def setup_logger(
-    level: int = logging.INFO, name: Optional[str] = DEFAULT_LOGGER_NAME
+    level: int = logging.INFO,
+    name: Optional[str] = DEFAULT_LOGGER_NAME,
+    json_format: bool = False,
+    use_queue: bool = False,
 ) -> logging.Logger:
+    """
+    Configures the logger `name`. Repeated calls replace the handler installed by a previous call instead of adding
+    another one. With `use_queue` records are only enqueued on the calling thread and written by a background
+    listener.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
 
+    # Remove the handler (and listener) of a previous setup
+    _stop_listener(logger.name)
+    for handler in list(logger.handlers):
+        if handler.get_name() == HANDLER_NAME:
+            logger.removeHandler(handler)
+            handler.close()
+
     # Console handler
     ch = logging.StreamHandler()
     ch.setLevel(level)
 
-    # Formatter with colored level names
-    formatter = ColoredFormatter(
-        "%(asctime)s [ %(levelname)s ] %(message)s", datefmt="%H:%M:%S"
-    )
+    if json_format:
+        formatter: logging.Formatter = JsonFormatter()
+    else:
+        # Formatter with colored level names
+        formatter = ColoredFormatter(
+            "%(asctime)s [ %(levelname)s ] %(message)s", datefmt="%H:%M:%S"
+        )
     ch.setFormatter(formatter)
 
-    logger.addHandler(ch)
+    if use_queue:
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        handler: logging.Handler = QueueHandler(log_queue)
+        listener = QueueListener(log_queue, ch, respect_handler_level=True)
+        listener.start()
+        _listeners[logger.name] = listener
+    else:
+        handler = ch
+    handler.set_name(HANDLER_NAME)
+    handler.setLevel(level)
+
+    logger.addHandler(handler)
 
     return logger
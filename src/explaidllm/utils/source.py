@@ -0,0 +1,126 @@
+"""Memory-mapped access to source lines for rendering code snippets"""
+
+import mmap
+from array import array
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Dict, Iterator, List, Optional, Union
+
+
+def map_readonly(file: BinaryIO) -> Optional[mmap.mmap]:
+    """Maps an open file read-only, returns None for empty files as they can't be mapped"""
+    try:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except ValueError:
+        return None
+
+
+@contextmanager
+def map_file(path: str) -> Iterator[Union[mmap.mmap, bytes]]:
+    """Maps a file read-only, the mapping can be searched and hashed without copying it (empty files yield b"")"""
+    with open(path, "rb") as file:
+        mapped = map_readonly(file)
+        if mapped is None:
+            yield b""
+            return
+        with mapped:
+            yield mapped
+
+
+@dataclass
+class SourceLine:
+    """A line of a source file, `highlighted` if it belongs to the span the snippet was requested for"""
+
+    number: int
+    content: str
+    highlighted: bool = False
+
+
+class SourceFile:
+    """
+    Read-only memory map of a source file with an index of line offsets. The index is only extended as far as the
+    requested lines, so showing a snippet near the top of a large instance file doesn't touch the rest of it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = map_readonly(self._file)
+        # Offsets of the line starts (line n starts at _offsets[n - 1])
+        self._offsets = array("q", [0])
+        self._complete = self._map is None
+
+    def _index_until(self, line: int) -> None:
+        """Extends the line offset index until it contains the start of line `line + 1` or the end of the file"""
+        while not self._complete and len(self._offsets) <= line:
+            newline = self._map.find(b"\n", self._offsets[-1])
+            if newline == -1:
+                self._complete = True
+            else:
+                self._offsets.append(newline + 1)
+
+    def line(self, number: int) -> Optional[str]:
+        """Returns the 1-based line `number` without its line break, None if the file is shorter"""
+        self._index_until(number)
+        if self._map is None or number < 1 or number > len(self._offsets):
+            return None
+        start = self._offsets[number - 1]
+        end = self._offsets[number] if number < len(self._offsets) else len(self._map)
+        if start >= len(self._map):
+            return None
+        return self._map[start:end].decode("utf-8", errors="replace").rstrip("\r\n")
+
+    def snippet(self, begin: int, end: int, context: int = 0) -> List[SourceLine]:
+        """Returns the lines `begin` to `end` (1-based, inclusive) with `context` lines before and after them"""
+        lines = []
+        for number in range(max(1, begin - context), end + context + 1):
+            content = self.line(number)
+            if content is None:
+                break
+            lines.append(
+                SourceLine(
+                    number=number,
+                    content=content.expandtabs(4),
+                    highlighted=begin <= number <= end,
+                )
+            )
+        return lines
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+
+class SourceCache:
+    """Maps every source file once and keeps it open for further snippets, use as a context manager"""
+
+    def __init__(self):
+        self._files: Dict[str, Optional[SourceFile]] = {}
+
+    def get(self, path: str) -> Optional[SourceFile]:
+        """Returns the mapped file at `path`, None if it can't be read (e.g. a program given as string)"""
+        if path not in self._files:
+            try:
+                self._files[path] = SourceFile(path)
+            except OSError:
+                self._files[path] = None
+        return self._files[path]
+
+    def snippet(
+        self, path: str, begin: int, end: int, context: int = 0
+    ) -> List[SourceLine]:
+        source = self.get(path)
+        return [] if source is None else source.snippet(begin, end, context)
+
+    def close(self) -> None:
+        for source in self._files.values():
+            if source is not None:
+                source.close()
+        self._files.clear()
+
+    def __enter__(self) -> "SourceCache":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
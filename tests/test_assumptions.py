@@ -0,0 +1,50 @@
+"""Tests for the array-backed assumption store"""
+
+import pytest
+from clingo import parse_term
+
+from explaidllm.utils.assumptions import AssumptionStore
+
+ASSUMPTIONS = [
+    (parse_term("a(1)"), True),
+    (parse_term("a(2)"), False),
+    (parse_term("b"), True),
+]
+
+
+def test_unbound_literals_are_positions():
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS)
+    assert list(store) == [1, -2, 3]
+    assert [store.position(literal) for literal in store] == [0, 1, 2]
+    assert list(store.iter_symbols()) == ASSUMPTIONS
+    assert store.render() == "{a(1)[+], a(2)[-], b[+]}"
+
+
+def test_bind_uses_solver_literals():
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS)
+    lookup = {parse_term("a(1)"): 7, parse_term("a(2)"): 3, parse_term("b"): 12}
+    bound = store.bind(lookup)
+    assert list(bound) == [7, -3, 12]
+    assert [bound.position(literal) for literal in (-3, 12, 7)] == [1, 2, 0]
+    assert list(bound.iter_strings([12, -3])) == ["b", "a(2)"]
+    assert list(bound.iter_symbols()) == ASSUMPTIONS
+
+
+@pytest.mark.parametrize("literal", [0, 4, -4])
+def test_unknown_unbound_literal(literal):
+    with pytest.raises(KeyError):
+        AssumptionStore.from_assumptions(ASSUMPTIONS).position(literal)
+
+
+@pytest.mark.parametrize("literal", [1, 8, 13])
+def test_unknown_bound_literal(literal):
+    store = AssumptionStore.from_assumptions(ASSUMPTIONS).bind(
+        {parse_term("a(1)"): 7, parse_term("a(2)"): 3, parse_term("b"): 12}
+    )
+    with pytest.raises(KeyError):
+        store.position(literal)
+
+
+def test_literals_and_symbols_need_the_same_length():
+    with pytest.raises(ValueError):
+        AssumptionStore([1, 2], [parse_term("a")])
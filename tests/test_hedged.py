@@ -0,0 +1,145 @@
+"""Tests for hedging LLM requests over several models"""
+
+import asyncio
+import json
+from typing import Optional, Tuple
+
+import pytest
+
+from explaidllm.llms.models import AbstractModel, HedgedModel, Usage
+
+VALID = json.dumps({"explanation": "x(4) and x(5) clash"})
+
+
+class StubModel(AbstractModel):
+    """Answers after `delay` seconds with `output`, or raises `error`"""
+
+    model_tag_key = "openai"
+
+    def __init__(
+        self,
+        name: str,
+        delay: float = 0.0,
+        output: str = VALID,
+        error: Optional[Exception] = None,
+        usage: Optional[Usage] = None,
+    ):
+        # pylint: disable=super-init-not-called
+        self.model_tag = name
+        self._delay = delay
+        self._output = output
+        self._error = error
+        self._usage = usage
+        self.cancelled = False
+
+    async def prompt(self, instructions_string: str, input_string: str) -> str:
+        output, _ = await self.prompt_with_usage(instructions_string, input_string)
+        return output
+
+    async def prompt_with_usage(
+        self, instructions_string: str, input_string: str
+    ) -> Tuple[str, Optional[Usage]]:
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self._error is not None:
+            raise self._error
+        return self._output, self._usage
+
+    async def prompt_template(self, template) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def transform_output(unfiltered_output: str) -> str:
+        return unfiltered_output
+
+
+def run(model: HedgedModel) -> Tuple[str, Optional[Usage]]:
+    return asyncio.run(model.prompt_with_usage("instructions", "input"))
+
+
+def test_first_model_wins_before_the_hedge_delay():
+    model = HedgedModel(
+        [StubModel("main", delay=0.01, usage=Usage(10, 5)), StubModel("hedge")],
+        hedge_delay=1.0,
+    )
+    output, usage = run(model)
+    assert output == VALID
+    assert usage == Usage(10, 5)
+    assert model.last_outcome.winner == "main"
+    assert model.last_outcome.launched == 1
+    assert model.last_outcome.cancelled == 0
+
+
+def test_delayed_hedge_wins_and_the_slow_request_is_cancelled():
+    slow = StubModel("main", delay=1.0, usage=Usage(10, 5))
+    model = HedgedModel(
+        [slow, StubModel("hedge", delay=0.01, usage=Usage(7, 3))], hedge_delay=0.05
+    )
+    output, usage = run(model)
+    assert output == VALID
+    assert model.last_outcome.winner == "hedge"
+    assert model.last_outcome.launched == 2
+    assert model.last_outcome.cancelled == 1
+    assert slow.cancelled
+    # The cancelled request reports no usage
+    assert usage == Usage(7, 3)
+    assert model.last_outcome.usage == Usage(7, 3)
+    assert model.last_outcome.latency < 1.0
+
+
+def test_invalid_output_falls_through_to_the_next_model():
+    model = HedgedModel(
+        [
+            StubModel("main", output="no json", usage=Usage(10, 5)),
+            StubModel("hedge", delay=0.01, usage=Usage(7, 3)),
+        ],
+        hedge_delay=1.0,
+    )
+    output, usage = run(model)
+    assert output == VALID
+    assert model.last_outcome.winner == "hedge"
+    assert model.last_outcome.launched == 2
+    # The hedge is sent right away instead of after the delay
+    assert model.last_outcome.latency < 1.0
+    # Both completed requests are paid for
+    assert usage == Usage(17, 8)
+    assert model.last_outcome.usage == Usage(17, 8)
+
+
+def test_failing_request_falls_through_to_the_next_model():
+    model = HedgedModel(
+        [
+            StubModel("main", error=ConnectionError("reset")),
+            StubModel("hedge", usage=Usage(7, 3)),
+        ],
+        hedge_delay=1.0,
+    )
+    output, usage = run(model)
+    assert output == VALID
+    assert model.last_outcome.winner == "hedge"
+    assert usage == Usage(7, 3)
+
+
+def test_all_requests_failing_raises_and_records_no_winner():
+    model = HedgedModel(
+        [
+            StubModel("main", error=ConnectionError("reset")),
+            StubModel("hedge", output="{}", usage=Usage(7, 3)),
+        ],
+        hedge_delay=0.0,
+    )
+    with pytest.raises(RuntimeError) as error:
+        run(model)
+    assert isinstance(error.value.__cause__, ConnectionError)
+    assert model.last_outcome.winner is None
+    assert model.last_outcome.launched == 2
+    assert model.last_outcome.cancelled == 0
+    assert model.last_outcome.usage == Usage(7, 3)
+
+
+def test_needs_a_model():
+    with pytest.raises(ValueError):
+        HedgedModel([])
@@ -0,0 +1,56 @@
+"""Tests for the distributed MUS computation with local workers"""
+
+from typing import List, Sequence, Tuple
+
+import clingo
+import pytest
+from clingo import Symbol, parse_term
+
+from explaidllm.mus import DistributedCoreComputer
+
+PROGRAMS = [
+    # A single conflicting pair
+    ("{a(1..6)}. :- a(2), a(5).", range(1, 7), ()),
+    # Two conflicts, only one of them is returned
+    ("{a(1..8)}. :- a(1), a(3). :- a(2), a(4), a(6).", range(1, 9), ()),
+    # Every assumption is necessary
+    ("{a(1..4)}. :- a(1), a(2), a(3), a(4).", range(1, 5), ()),
+    # A negative assumption in one of two conflicts
+    ("{a(1..7)}. b :- not a(2). :- b, a(7). :- a(1), a(4), a(6).", range(1, 8), (2,)),
+]
+
+
+def assumptions_of(
+    arguments: Sequence[int], negative: Sequence[int]
+) -> List[Tuple[Symbol, bool]]:
+    return [(parse_term(f"a({i})"), i not in negative) for i in arguments]
+
+
+def is_satisfiable(program: str, assumptions: Sequence[Tuple[Symbol, bool]]) -> bool:
+    control = clingo.Control()
+    control.add("base", [], program)
+    control.ground([("base", [])])
+    return control.solve(assumptions=list(assumptions)).satisfiable
+
+
+@pytest.mark.parametrize("workers", [1, 2, 3])
+@pytest.mark.parametrize("program,arguments,negative", PROGRAMS)
+def test_shrink_returns_minimal_unsatisfiable_subset(
+    program, arguments, negative, workers
+):
+    core = assumptions_of(arguments, negative)
+    assert not is_satisfiable(program, core)
+
+    with DistributedCoreComputer(program=program, local_workers=workers) as dcc:
+        mus = dcc.shrink(core)
+
+    assert mus
+    assert set(mus) <= set(core)
+    assert not is_satisfiable(program, mus)
+    for i in range(len(mus)):
+        assert is_satisfiable(program, mus[:i] + mus[i + 1 :])
+
+
+def test_needs_a_worker():
+    with pytest.raises(ValueError):
+        DistributedCoreComputer(program="a.")
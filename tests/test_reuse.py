@@ -0,0 +1,131 @@
+"""Tests for the reuse of explanations across conflicts with the same structure"""
+
+from typing import List, Tuple
+
+from clingo import Symbol, parse_term
+
+from explaidllm.llms.reuse import ConflictSignature, ExplanationStore
+
+SUDOKU_CONSTRAINTS = [":- sudoku(X1,Y,N); sudoku(X2,Y,N); X1 > X2."]
+
+
+def conflict(*atoms: str) -> List[Tuple[Symbol, bool]]:
+    return [(parse_term(atom), True) for atom in atoms]
+
+
+def signature(*atoms: str) -> ConflictSignature:
+    return ConflictSignature.from_conflict(conflict(*atoms), SUDOKU_CONSTRAINTS)
+
+
+def test_signature_ignores_constants_and_order():
+    first = signature("initial(1,1,2)", "initial(3,1,2)")
+    second = signature("initial(6,4,3)", "initial(4,4,3)")
+    assert first.key == second.key
+    assert first.digest == second.digest
+
+
+def test_signature_differs_for_other_structures():
+    same_row = signature("initial(1,1,2)", "initial(3,1,2)")
+    other_rows = signature("initial(1,1,2)", "initial(3,2,2)")
+    other_constraint = ConflictSignature.from_conflict(
+        conflict("initial(1,1,2)", "initial(3,1,2)"), [":- a."]
+    )
+    assert same_row.key != other_rows.key
+    assert same_row.key != other_constraint.key
+
+
+def test_round_trip_instantiates_atoms():
+    stored = signature("initial(1,1,2)", "initial(3,1,2)")
+    template, confidence = stored.abstract(
+        "initial(1,1,2) and initial(3,1,2) place the same number twice."
+    )
+    assert confidence == 1.0
+    assert (
+        signature("initial(2,4,3)", "initial(4,4,3)").instantiate(template)
+        == "initial(2,4,3) and initial(4,4,3) place the same number twice."
+    )
+
+
+def test_round_trip_of_the_same_conflict_is_identity():
+    explanation = "initial(1,1,2) and initial(3,1,2) are both 2 in row 1."
+    stored = signature("initial(1,1,2)", "initial(3,1,2)")
+    template, _ = stored.abstract(explanation)
+    assert stored.instantiate(template) == explanation
+
+
+def test_standalone_constants_lower_the_confidence():
+    stored = ConflictSignature.from_conflict(
+        conflict("holds(a)", "holds(b)"), [":- holds(X); holds(Y); X != Y."]
+    )
+    _, confidence = stored.abstract(
+        "Only a single item may hold, but holds(a) and holds(b) both hold."
+    )
+    assert confidence < 1.0
+
+
+def test_ambiguous_constant_with_different_values_is_not_filled():
+    stored = signature("initial(1,1,2)", "initial(3,1,2)")
+    template, _ = stored.abstract("initial(1,1,2) and initial(3,1,2) in row 1.")
+    assert signature("initial(2,4,3)", "initial(4,4,3)").instantiate(template) is None
+
+
+def test_ambiguous_constant_with_equal_values_is_filled():
+    stored = signature("initial(1,1,2)", "initial(3,1,2)")
+    template, _ = stored.abstract("initial(1,1,2) and initial(3,1,2) in row 1.")
+    assert (
+        signature("initial(4,4,3)", "initial(6,4,3)").instantiate(template)
+        == "initial(4,4,3) and initial(6,4,3) in row 4."
+    )
+
+
+def test_store_reuses_explanation_of_same_structure():
+    store = ExplanationStore(path=None)
+    store.add(
+        signature("initial(1,1,2)", "initial(3,1,2)"),
+        "initial(1,1,2) and initial(3,1,2) place the same number twice.",
+    )
+    assert (
+        store.lookup(signature("initial(2,4,3)", "initial(4,4,3)"))
+        == "initial(2,4,3) and initial(4,4,3) place the same number twice."
+    )
+    assert store.lookup(signature("initial(1,1,2)", "initial(3,2,2)")) is None
+
+
+def test_store_rejects_wrong_row():
+    store = ExplanationStore(path=None)
+    store.add(
+        signature("initial(1,1,2)", "initial(3,1,2)"),
+        "initial(1,1,2) and initial(3,1,2) are both 2 in row 1.",
+    )
+    assert store.lookup(signature("initial(2,4,3)", "initial(4,4,3)")) is None
+
+
+def test_store_rejects_replaced_words():
+    store = ExplanationStore(path=None)
+    constraints = [":- holds(X); holds(Y); X != Y."]
+    store.add(
+        ConflictSignature.from_conflict(conflict("holds(a)", "holds(b)"), constraints),
+        "Only a single item may hold, but holds(a) and holds(b) both hold.",
+    )
+    assert (
+        store.lookup(
+            ConflictSignature.from_conflict(
+                conflict("holds(x)", "holds(y)"), constraints
+            )
+        )
+        is None
+    )
+
+
+def test_store_persists_templates(tmp_path):
+    path = tmp_path / "explanations.json"
+    ExplanationStore(path=path).add(
+        signature("initial(1,1,2)", "initial(3,1,2)"),
+        "initial(1,1,2) and initial(3,1,2) place the same number twice.",
+    )
+    assert (
+        ExplanationStore(path=path).lookup(
+            signature("initial(2,4,3)", "initial(4,4,3)")
+        )
+        == "initial(2,4,3) and initial(4,4,3) place the same number twice."
+    )
@@ -0,0 +1,62 @@
+"""Tests for the solver stages run in limited child processes"""
+
+import pytest
+
+from explaidllm.stages import (
+    compute_mus,
+    compute_mus_limited,
+    compute_ucs,
+    compute_ucs_limited,
+    is_satisfiable_limited,
+    preprocess,
+    preprocess_limited,
+)
+from explaidllm.utils.limits import LimitExceeded, ResourceLimits
+
+PROGRAM = "x(1..5).\n:- x(4), x(5).\n"
+LIMITS = ResourceLimits(memory=2**30, time=60)
+
+
+@pytest.fixture
+def program_file(tmp_path):
+    path = tmp_path / "program.lp"
+    path.write_text(PROGRAM)
+    return str(path)
+
+
+def mus_strings(mus, assumptions):
+    return sorted(assumptions.iter_strings(a.literal for a in mus.assumptions))
+
+
+def test_limited_stages_match_unlimited_stages(program_file):
+    program, assumptions = preprocess([program_file])
+    limited_program, limited_assumptions = preprocess_limited(
+        [program_file], None, LIMITS
+    )
+    assert limited_program == program
+    assert sorted(limited_assumptions.iter_strings()) == sorted(
+        assumptions.iter_strings()
+    )
+    assert not is_satisfiable_limited([program_file], LIMITS)
+
+    mus, bound = compute_mus(program, assumptions)
+    limited_mus, limited_store = compute_mus_limited(
+        limited_program, limited_assumptions, LIMITS
+    )
+    assert mus_strings(limited_mus, limited_store) == mus_strings(mus, bound)
+    assert mus_strings(limited_mus, limited_store) == ["x(4)", "x(5)"]
+
+    ucs, locations = compute_ucs([program_file], mus, bound)
+    limited_ucs, limited_locations = compute_ucs_limited(
+        [program_file], limited_mus, limited_store, LIMITS
+    )
+    assert limited_ucs == ucs
+    assert limited_locations == locations
+    assert [location.begin.line for location in limited_locations.values()] == [2]
+
+
+def test_limited_ucs_raises_when_a_limit_is_hit(program_file):
+    program, assumptions = preprocess([program_file])
+    mus, bound = compute_mus(program, assumptions)
+    with pytest.raises(LimitExceeded):
+        compute_ucs_limited([program_file], mus, bound, ResourceLimits(time=0.001))